@@ -1,6 +1,16 @@
 # Agent Personalities Configuration
 
-AGENT_PERSONALITIES = {
+import sys
+from types import MappingProxyType
+from typing import NamedTuple, Tuple
+
+
+class Personality(NamedTuple):
+    name: str
+    personality: str
+
+
+_PERSONALITY_DEFINITIONS = {
     "Miranda": {
         "name": "Miranda",
         "personality": "I am extremely suspicious and paranoid. I always question everyone's motives and see hidden meanings in everything. I frequently change who I suspect based on small details. I ask lots of probing questions and demand explanations for every action. I often accuse multiple people in one conversation. I speak in a worried, questioning tone."
@@ -35,10 +45,18 @@ AGENT_PERSONALITIES = {
     }
 }
 
+# Read-only lookup of Personality tuples. Strings are interned since they are
+# reused for the whole game, so every reference shares one object.
+AGENT_PERSONALITIES = MappingProxyType({
+    key: Personality(sys.intern(entry["name"]), sys.intern(entry["personality"]))
+    for key, entry in _PERSONALITY_DEFINITIONS.items()
+})
+
 # Role distribution for 8 players
-ROLE_DISTRIBUTION = [
+ROLE_DISTRIBUTION: Tuple[str, ...] = (
     "mafia", "mafia", "mafia",  # 3 Mafia
     "doctor",                   # 1 Doctor
     "detective",               # 1 Detective
     "villager", "villager", "villager"  # 3 Villagers
-]
\ No newline at end of file
+)
+assert len(ROLE_DISTRIBUTION) == len(AGENT_PERSONALITIES), "ROLE_DISTRIBUTION needs one role per personality"
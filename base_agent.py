@@ -1,17 +1,147 @@
+import random
+import re
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
 from game_state import GameState, Player, Role, GamePhase
 from llm_interface import LLMInterface
+from structured_responses import DiscussionResponse, NightDecision, VoteDecision
+
+# Role guidelines never change, so they are shared by every agent instance
+_ROLE_GUIDELINES: Dict[Role, str] = {
+    Role.MAFIA: """- You know who the other Mafia members are
+- During Night phase, coordinate with other Mafia to choose someone to eliminate
+- During Day phase, blend in and deflect suspicion
+- Try to eliminate key Village roles (Doctor, Detective) if you can identify them""",
+    
+    Role.DOCTOR: """- Each night, choose one person to save from elimination
+- You can save yourself if you don't have a better clue
+- You don't know if your save was successful unless someone was targeted
+- Keep your identity secret to avoid being targeted""",
+    
+    Role.DETECTIVE: """- Each night, investigate one person to learn their role
+- Use this information strategically during Day discussions
+- Be careful about revealing your findings - Mafia will target you if discovered""",
+    
+    Role.VILLAGER: """- You have no special abilities
+- Use discussion and voting to identify and eliminate Mafia members
+- Pay attention to voting patterns and behavior to spot suspicious players"""
+}
+
+D = TypeVar('D', NightDecision, VoteDecision)  # responses that name a target
+
+# Reply budgets (max_tokens) per kind of call, so each phase's batch decodes to a similar length
+DECISION_MAX_TOKENS = 150  # target + brief reason
+DISCUSSION_MAX_TOKENS = 250  # speak flag, urgency and a comment under 100 words
+DEFENSE_MAX_TOKENS = 300  # defense under 150 words
+
+# A discussion reply that declines to speak needs no comment, so its stream is cut off there
+DISCUSSION_ABORT_ON = {'speak': False}
+
+# Accusation words looked for in messages that name an agent; substring matches, so "sus" covers "suspicious"
+_ATTACK_RE = re.compile(r"sus|mafia|vote|eliminate")
+
+# Fuzzy target matching weights (FZF-style): matched chars score, gaps inside the match cost
+_SCORE_MATCH = 16
+_BONUS_CONSECUTIVE = 8
+_BONUS_BOUNDARY = 8
+_PENALTY_GAP = 1
+_MIN_MATCH_SCORE = 3 * _SCORE_MATCH  # a fuzzy match needs at least three matched characters
+
+def subseq_score(pattern: str, text: str) -> int:
+    """Score pattern as a subsequence of text, or -1 if it isn't one. Pass both lowercased.
+    
+    Finds the earliest complete match, walks back from its end to the tightest window, then
+    rewards consecutive and word-boundary matches and charges for the gaps in between.
+    """
+    if not pattern:
+        return -1
+    
+    # Forward pass: where the first complete match ends
+    pi = 0
+    for end, ch in enumerate(text):
+        if ch == pattern[pi]:
+            pi += 1
+            if pi == len(pattern):
+                break
+    else:
+        return -1
+    
+    # Backward pass: latest start that still matches, i.e. the shortest window
+    pi = len(pattern) - 1
+    start = end
+    while pi >= 0:
+        if text[start] == pattern[pi]:
+            pi -= 1
+        start -= 1
+    start += 1
+    
+    score = 0
+    pi = 0
+    prev = -2
+    for ti in range(start, end + 1):
+        if pi < len(pattern) and text[ti] == pattern[pi]:
+            score += _SCORE_MATCH
+            if ti == prev + 1:
+                score += _BONUS_CONSECUTIVE
+            if ti == 0 or not text[ti - 1].isalnum():
+                score += _BONUS_BOUNDARY
+            prev = ti
+            pi += 1
+        else:
+            score -= _PENALTY_GAP
+    return score
+
+def closest_candidate(raw: str, candidates: List[str]) -> str:
+    """Candidate the LLM most likely meant by raw; falls back to candidates[0]"""
+    if raw in candidates:
+        return raw
+    
+    # Lowercase each candidate once; a reply that is just the name in another case needs no scoring
+    lut = {candidate.lower(): candidate for candidate in candidates}
+    raw_lower = raw.strip().lower()
+    if raw_lower in lut:
+        return lut[raw_lower]
+    
+    best, best_score = candidates[0], _MIN_MATCH_SCORE - 1
+    for candidate_lower, candidate in lut.items():
+        # Name somewhere in a longer reply ("Boris, he was quiet"), or a misspelt name ("Bors")
+        score = max(subseq_score(candidate_lower, raw_lower), subseq_score(raw_lower, candidate_lower))
+        if score > best_score:
+            best, best_score = candidate, score
+    return best
+
+def plurality_pick(decisions: Sequence[D]) -> D:
+    """Decision whose target most samples agree on (case-insensitive); ties go to the earliest sample"""
+    counts: Dict[str, int] = {}
+    for decision in decisions:
+        key = decision.target.strip().lower()
+        counts[key] = counts.get(key, 0) + 1
+    best = max(counts, key=counts.get)
+    return next(decision for decision in decisions if decision.target.strip().lower() == best)
 
 class BaseAgent(ABC):
+    # Sampled replies per decide() call; above 1, the plurality target wins
+    samples = 1
+    # Discussion urgency (1-5) when not under attack
+    base_urgency = 3
+    
     def __init__(self, name: str, personality: str, role: Role, llm_interface: LLMInterface):
         self.name = name
+        self._name_lower = name.lower()
         self.personality = personality
         self.role = role
+        self.role_name = role.value
         self.llm = llm_interface
-    
-    def get_base_context(self, game_state: GameState) -> str:
-        context = f"""You are {self.name}, playing a game of Mafia.
+        # LLM for discussion and votes; roles with a cheaper model for those calls swap it in
+        self.routine_llm = llm_interface
+        self._role_guidelines = _ROLE_GUIDELINES.get(role, "")
+        # ((game state id, state version), role section) for the last state rendered
+        self._private_cache: Optional[Tuple[Tuple[int, int], str]] = None
+        
+        # Everything up to the role guidelines is fixed for the agent's lifetime,
+        # so build it once and keep it byte-identical across calls (prompt caching)
+        self._static_prefix = f"""You are {self.name}, playing a game of Mafia.
 
 PERSONALITY: {self.personality}
 
@@ -23,164 +153,144 @@ GAME RULES:
 - Mafia wins if they equal or outnumber the Village
 - When players are eliminated, their roles are NOT revealed to others
 
-YOUR ROLE: {self.role.value.upper()}
-{self._get_role_guidelines()}
-
-CURRENT GAME STATE:
-- Phase: {game_state.phase.value}
-- Round: {game_state.round_number}
-- Players alive: {', '.join(game_state.alive_players)}
-- Players eliminated: {', '.join(game_state.elimination_history)} (roles unknown)
+YOUR ROLE: {self.role_name.upper()}
+{self._role_guidelines}
 
-{self._get_role_specific_knowledge(game_state)}
-
-{self._get_complete_game_history(game_state)}
 """
-        return context
     
-    def _get_role_guidelines(self) -> str:
-        guidelines = {
-            Role.MAFIA: """- You know who the other Mafia members are
-- During Night phase, coordinate with other Mafia to choose someone to eliminate
-- During Day phase, blend in and deflect suspicion
-- Try to eliminate key Village roles (Doctor, Detective) if you can identify them""",
-            
-            Role.DOCTOR: """- Each night, choose one person to save from elimination
-- You can save yourself if you don't have a better clue
-- You don't know if your save was successful unless someone was targeted
-- Keep your identity secret to avoid being targeted""",
-            
-            Role.DETECTIVE: """- Each night, investigate one person to learn their role
-- Use this information strategically during Day discussions
-- Be careful about revealing your findings - Mafia will target you if discovered""",
-            
-            Role.VILLAGER: """- You have no special abilities
-- Use discussion and voting to identify and eliminate Mafia members
-- Pay attention to voting patterns and behavior to spot suspicious players"""
+    def get_base_context(self, game_state: GameState, include_history: bool = True, include_role_knowledge: bool = True,
+                         shared_block: Optional[str] = None) -> str:
+        """Full context for an LLM call. Sections a call doesn't need can be left out.
+        
+        shared_block lets a caller pass in a GameState.build_shared_context_block()
+        it has already rendered for this state, instead of looking it up again.
+        """
+        return self._static_prefix + self.get_dynamic_suffix(game_state, include_history, include_role_knowledge, shared_block)
+    
+    def get_static_prefix(self) -> str:
+        """Personality, rules and role guidelines. Byte-identical for the whole game."""
+        return self._static_prefix
+    
+    def get_dynamic_suffix(self, game_state: GameState, include_history: bool = True, include_role_knowledge: bool = True,
+                           shared_block: Optional[str] = None) -> str:
+        """Per-call part of the context: role knowledge, then the block shared by all agents"""
+        if shared_block is None:
+            shared_block = self._public_context(game_state, include_history)
+        knowledge = self._private_context(game_state) if include_role_knowledge else ""
+        return f"{knowledge}\n{shared_block}" if knowledge else shared_block
+    
+    def _public_context(self, game_state: GameState, include_history: bool = True) -> str:
+        """Context every agent sees; GameState renders it once per state for all of them"""
+        return game_state.build_shared_context_block(include_history)
+    
+    def _private_context(self, game_state: GameState) -> str:
+        """This agent's role section, rebuilt only when the game state has changed"""
+        key = (id(game_state), game_state.version)
+        if self._private_cache is None or self._private_cache[0] != key:
+            self._private_cache = (key, self._build_role_section(game_state))
+        return self._private_cache[1]
+    
+    def get_base_context_struct(self, game_state: GameState) -> Dict[str, Any]:
+        """Same information as get_base_context, as plain data for providers that render it themselves"""
+        return {
+            "name": self.name,
+            "personality": self.personality,
+            "role": self.role_name,
+            "role_guidelines": self._role_guidelines,
+            "role_knowledge": self._private_context(game_state),
+            "phase": game_state.phase.value,
+            "round": game_state.round_number,
+            "alive": list(game_state.alive_players),
+            "eliminated": list(game_state.elimination_history),
+            "history": {
+                # round -> [{player, message}]
+                "discussion": {
+                    round_num: [{"player": msg.player_name, "message": msg.message} for msg in msgs]
+                    for round_num, msgs in sorted(game_state.messages_by_round.items())
+                },
+                "voting": game_state.voting_history,
+            },
         }
-        return guidelines.get(self.role, "")
     
-    def _get_role_specific_knowledge(self, game_state: GameState) -> str:
-        knowledge = ""
-        
-        if self.role == Role.MAFIA:
-            mafia_members = [p.name for p in game_state.players if p.role == Role.MAFIA]
-            knowledge += f"MAFIA TEAM: {', '.join(mafia_members)}\n"
-            
-            # Show individual Mafia proposals and team decisions
-            knowledge += "YOUR PROPOSALS AND TEAM DECISIONS:\n"
-            player_actions = game_state.player_night_actions.get(self.name, [])
-            mafia_actions = [action for action in player_actions if action['action_type'] == 'mafia_propose']
-            
-            if mafia_actions:
-                for action in mafia_actions:
-                    knowledge += f"- Round {action['round']}: You proposed {action['target']} ({action['reason']})\n"
-            else:
-                knowledge += "- No proposals made yet\n"
-        
-        elif self.role == Role.DETECTIVE:
-            knowledge += "YOUR INVESTIGATION RESULTS:\n"
-            if hasattr(game_state, 'detective_results') and game_state.detective_results:
-                for target, role in game_state.detective_results.items():
-                    knowledge += f"- {target}: {role}\n"
-            else:
-                knowledge += "- No investigations completed yet\n"
-        
-        elif self.role == Role.DOCTOR:
-            knowledge += "YOUR SAVE HISTORY:\n"
-            player_actions = game_state.player_night_actions.get(self.name, [])
-            doctor_actions = [action for action in player_actions if action['action_type'] == 'doctor_save']
-            
-            if doctor_actions:
-                for action in doctor_actions:
-                    knowledge += f"- Round {action['round']}: Saved {action['target']} ({action['reason']})\n"
-            else:
-                knowledge += "- No saves attempted yet\n"
+    def _build_role_section(self, game_state: GameState) -> str:
+        """Role-private knowledge shown in the context. Roles with secrets override this."""
+        return ""
+    
+    def is_being_attacked(self, game_state: GameState) -> bool:
+        """True if one of the last few discussion messages names this agent alongside an accusation"""
+        name_lower = self._name_lower
+        return any(name_lower in msg.message_lower and _ATTACK_RE.search(msg.message_lower)
+                   for msg in game_state.discussion_messages[-5:])
+    
+    def discussion_urgency(self, game_state: GameState) -> int:
+        """5 when under attack, otherwise the role's base urgency"""
+        return 5 if self.is_being_attacked(game_state) else self.base_urgency
+    
+    def should_attempt_speak(self, game_state: GameState, rng=random) -> bool:
+        """Cheap gate before asking the LLM whether to speak: always at urgency 5, otherwise with chance urgency/5.
         
-        return knowledge
+        Losing the roll only skips this turn's LLM call; it is not the agent declining to speak.
+        """
+        urgency = self.discussion_urgency(game_state)
+        return urgency >= 5 or rng.random() < urgency / 5
     
     def _get_complete_game_history(self, game_state: GameState) -> str:
-        history_str = ""
-        
-        # Discussion history grouped by round
-        if game_state.discussion_messages:
-            history_str += "DISCUSSION HISTORY:\n"
-            
-            # Group messages by round
-            messages_by_round = {}
-            for msg in game_state.discussion_messages:
-                round_num = getattr(msg, 'round_number', 1)
-                if round_num not in messages_by_round:
-                    messages_by_round[round_num] = []
-                messages_by_round[round_num].append(msg)
-            
-            # Display messages grouped by round
-            for round_num in sorted(messages_by_round.keys()):
-                if len(messages_by_round) > 1:
-                    history_str += f"\n=== Day {round_num} Discussion ===\n"
-                for msg in messages_by_round[round_num]:
-                    history_str += f"- {msg.player_name}: {msg.message}\n"
-            history_str += "\n"
-        
-        # Voting history with reasons
-        if hasattr(game_state, 'voting_history') and game_state.voting_history:
-            history_str += "VOTING HISTORY:\n"
-            for round_info in game_state.voting_history:
-                # Show the day and voting round if available
-                voting_round_num = round_info.get('voting_round', 1)
-                if voting_round_num > 1:
-                    history_str += f"=== Day {round_info['round']} Voting (Round {voting_round_num}) ===\n"
-                else:
-                    history_str += f"=== Day {round_info['round']} Voting ===\n"
-                
-                # Show initial votes
-                if round_info['votes']:
-                    history_str += "Initial votes:\n"
-                    for vote_info in round_info['votes']:
-                        history_str += f"- {vote_info['voter']} votes for {vote_info['target']}: {vote_info['reason']}\n"
-                
-                # Show trial information
-                if 'trial_candidate' in round_info:
-                    history_str += f"Trial: {round_info['trial_candidate']} (most votes)\n"
-                elif 'tied_candidates' in round_info:
-                    history_str += f"Tie between: {', '.join(round_info['tied_candidates'])} ({round_info['tie_votes']} votes each)\n"
-                
-                # Show defense
-                if 'defense' in round_info:
-                    history_str += f"Defense by {round_info['trial_candidate']}: {round_info['defense']}\n"
-                
-                # Show final votes after defense
-                if 'final_votes' in round_info and round_info['final_votes']:
-                    history_str += "Final votes after defense:\n"
-                    for vote_info in round_info['final_votes']:
-                        history_str += f"- {vote_info['voter']} votes for {vote_info['target']}: {vote_info['reason']}\n"
-                
-                # Show elimination result
-                if 'eliminated' in round_info:
-                    eliminated_player = round_info['eliminated']
-                    if eliminated_player == True:
-                        eliminated_player = "Unknown player"
-                    elif eliminated_player == False:
-                        eliminated_player = "No one"
-                    history_str += f"Eliminated: {eliminated_player}\n"
-                
-                history_str += "\n"
-        
-        return history_str if history_str else "No game history yet."
+        # History is the same for every agent, so GameState renders and caches it
+        return game_state.render_history()
     
+    async def decide(self, prompt: str, response_class: Type[D], llm: Optional[LLMInterface] = None) -> D:
+        """Ask llm (default self.llm) for a target decision after the static prefix.
+        
+        Samples it self.samples times if that is above 1.
+        """
+        llm = llm or self.llm
+        prefix = self.get_static_prefix()
+        if self.samples <= 1:
+            return await llm.agenerate_structured_response(prompt, response_class, prefix=prefix, max_tokens=DECISION_MAX_TOKENS)
+        return plurality_pick(await llm.asample_structured_response(prompt, response_class, self.samples, prefix=prefix,
+                                                                    max_tokens=DECISION_MAX_TOKENS))
     
     @abstractmethod
-    def make_night_decision(self, game_state: GameState) -> Optional[Dict]:
+    async def make_night_decision(self, game_state: GameState) -> Optional[NightDecision]:
         pass
     
+    async def participate_in_discussion(self, game_state: GameState, shared_block: Optional[str] = None) -> Optional[DiscussionResponse]:
+        """Ask the LLM whether and what to say. The orchestrator runs the same steps batched across agents.
+        
+        None if the agent sits this turn out: outside the discussion phase, or when should_attempt_speak says so.
+        """
+        if game_state.phase != GamePhase.DAY_DISCUSSION or not self.should_attempt_speak(game_state):
+            return None
+        prompt = self.build_discussion_prompt(game_state, shared_block)
+        if prompt is None:
+            return None
+        return await self.routine_llm.agenerate_structured_response(prompt, DiscussionResponse, prefix=self.get_static_prefix(),
+                                                                    max_tokens=DISCUSSION_MAX_TOKENS, abort_on=DISCUSSION_ABORT_ON)
+    
     @abstractmethod
-    def participate_in_discussion(self, game_state: GameState) -> Optional[str]:
+    def build_discussion_prompt(self, game_state: GameState, shared_block: Optional[str] = None) -> Optional[str]:
+        """Discussion prompt, sent after get_static_prefix(). None if the agent doesn't take part in this phase."""
         pass
     
+    async def vote(self, game_state: GameState, candidates: List[str]) -> VoteDecision:
+        """Ask the LLM for this agent's vote. The orchestrator runs the same steps batched across voters."""
+        prompt = self.build_vote_prompt(game_state, candidates)
+        vote_decision = await self.decide(prompt, VoteDecision, self.routine_llm)
+        return self.finalize_vote(vote_decision, candidates)
+    
     @abstractmethod
-    def vote(self, game_state: GameState, candidates: List[str]) -> Dict[str, str]:
+    def build_vote_prompt(self, game_state: GameState, candidates: List[str]) -> str:
+        """Voting prompt, sent after get_static_prefix()"""
         pass
     
+    def finalize_vote(self, vote_decision: VoteDecision, candidates: List[str]) -> VoteDecision:
+        """Map the LLM's target onto one of the candidates"""
+        # Validate target is in candidates
+        if vote_decision.target not in candidates:
+            vote_decision = replace(vote_decision, target=closest_candidate(vote_decision.target, candidates))
+        
+        return vote_decision
+    
     @abstractmethod
-    def defend_self(self, game_state: GameState) -> str:
+    async def defend_self(self, game_state: GameState) -> str:
         pass
\ No newline at end of file
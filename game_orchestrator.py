@@ -1,109 +1,243 @@
+import asyncio
+import functools
+import json
+import logging
 import random
 import os
+import queue
 import shutil
-from typing import Dict, List, Optional
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from game_state import GameState, Player, Role, GamePhase, GameAction
-from base_agent import BaseAgent
+from base_agent import BaseAgent, DISCUSSION_ABORT_ON, DISCUSSION_MAX_TOKENS, closest_candidate
 from role_agents import MafiaAgent, DoctorAgent, DetectiveAgent, VillagerAgent
 from llm_interface import LLMInterface
+from structured_responses import DiscussionResponse, NightDecision, VoteDecision
 from agent_personalities import AGENT_PERSONALITIES, ROLE_DISTRIBUTION
 
+# Final-vote prompt pieces; only the names change between voters
+_FINAL_VOTE_NOTE_TMPL = ("\n\nFINAL VOTING AFTER DEFENSE:\n{suspect} just defended themselves. "
+                         "Consider their defense when making your vote.\n"
+                         "You can vote for the same person as before or change your vote.")
+_FINAL_VOTE_TMPL = ("{context}\n\nFINAL VOTING PHASE\n\n"
+                    "Vote to eliminate one of: {candidates}\n\n"
+                    "After hearing {suspect}'s defense, who do you want to eliminate?\n"
+                    "Choose your target and provide a clear reason considering the defense.")
+
+# Response cache shared across runs (cache_llm_responses=True)
+_LLM_CACHE_PATH = os.path.join("game_logs", "llm_cache.json")
+
+class _PrefixFormatter(logging.Formatter):
+    """Formats a record as its message behind a per-level prefix"""
+    def __init__(self, prefixes: Dict[int, str]):
+        super().__init__()
+        self._prefixes = prefixes
+    
+    def format(self, record: logging.LogRecord) -> str:
+        return self._prefixes.get(record.levelno, "") + record.getMessage()
+
+# One logger for every game; each game logs through an adapter that tags its records, and its
+# handlers only take records with its tag. Per-game loggers would stay registered after the game ends.
+_LOGGER = logging.getLogger("mafia")
+_LOGGER.setLevel(logging.DEBUG)
+_LOGGER.propagate = False
+
+async def play_games(llm_interface: LLMInterface, num_games: int, **orchestrator_kwargs) -> List[str]:
+    """Play num_games games at once on one LLM interface and return their winners.
+    
+    Every game's calls in a phase are in flight together, so a server with continuous
+    batching and prefix caching (e.g. vLLM) schedules all of them as one workload.
+    With cache_llm_responses=True the games share one response cache, enabled and saved here.
+    """
+    cache_llm_responses = orchestrator_kwargs.pop('cache_llm_responses', False)
+    llm_cache_path = orchestrator_kwargs.pop('llm_cache_path', _LLM_CACHE_PATH)
+    if cache_llm_responses:
+        llm_interface.enable_response_cache(llm_cache_path)
+    games = [GameOrchestrator(llm_interface, **orchestrator_kwargs) for _ in range(num_games)]
+    try:
+        for game in games:
+            game.initialize_game()
+        return await asyncio.gather(*(game.play_game() for game in games))
+    finally:
+        for game in games:
+            game.close()
+        if cache_llm_responses:
+            llm_interface.save_response_cache()
+
 class GameOrchestrator:
-    def __init__(self, llm_interface: LLMInterface, max_discussion_rounds: int = 3, max_mafia_iterations: int = 3, num_mafia: int = 3, debug_mode: bool = False, observer_mode: bool = True, observer_only: bool = False, log_intermediate_contexts: bool = True):
+    def __init__(self, llm_interface: LLMInterface, max_discussion_rounds: int = 3, num_mafia: int = 3, debug_mode: bool = False, observer_mode: bool = True, observer_only: bool = False, log_intermediate_contexts: bool = True, cache_llm_responses: bool = False, llm_cache_path: str = _LLM_CACHE_PATH, mafia_samples: int = 1, villager_llm: Optional[LLMInterface] = None):
         self.llm = llm_interface
         self.game_state = GameState()
         self.agents: Dict[str, BaseAgent] = {}
+        self.agents_by_role: Dict[Role, List[BaseAgent]] = {role: [] for role in Role}
         self.max_discussion_rounds = max_discussion_rounds
-        self.max_mafia_iterations = max_mafia_iterations
         self.num_mafia = num_mafia
         self.debug_mode = debug_mode
         self.observer_mode = observer_mode
         self.observer_only = observer_only
         self.log_intermediate_contexts = log_intermediate_contexts
+        self.mafia_samples = mafia_samples  # sampled replies per Mafia night/vote decision
+        self.villager_llm = villager_llm  # cheaper LLM for Villager discussion and votes, if any
+        
+        # Agent contexts are written by a background thread so logging never blocks an LLM fan-out
+        self._context_log_queue = queue.Queue()  # (path, text) items; None stops the writer
+        self._context_log_thread = threading.Thread(target=self._drain_context_log, name="mafia-context-log", daemon=True)
+        self._context_log_thread.start()
+        
+        # agent name -> ((state version, phase, round), base context)
+        self._context_cache: Dict[str, Tuple[tuple, str]] = {}
+        
+        # Who sees game messages: players (stdout) and/or observers (stdout + observer log)
+        self._channels = {"player": self.observer_only is False, "observer": self.observer_mode}
+        
+        # Pause between discussion messages only when someone is watching the terminal
+        self.interactive_pacing = (not observer_only) and sys.stdout.isatty()
+        self._pacing_s = 0.5
         
         # Track speaking frequency for discussion balance
         self.speaking_counts = {}  # player_name -> count of times spoken this round
         
-        # Create game session directory
+        # Per-agent discussion signals used to decide who is worth asking each sub-round
+        self.last_urgency = {}  # player_name -> urgency from their last discussion response
+        self.last_spoke_round = {}  # player_name -> sub-round they last spoke in
+        self.silent_streaks = {}  # player_name -> consecutive responses declining to speak
+        self.next_query_round = {}  # player_name -> first sub-round they are asked again after backing off
+        
+        # Create game session directory; games started in the same second get a numbered suffix
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs("game_logs", exist_ok=True)
         self.game_log_dir = os.path.join("game_logs", f"game_{timestamp}")
-        os.makedirs(self.game_log_dir, exist_ok=True)
+        suffix = 1
+        while True:
+            try:
+                os.mkdir(self.game_log_dir)
+                break
+            except FileExistsError:
+                suffix += 1
+                self.game_log_dir = os.path.join("game_logs", f"game_{timestamp}_{suffix}")
         
         # Initialize observer log in the session directory
         self.log_file = os.path.join(self.game_log_dir, "observer_log.txt")
-        if self.observer_mode:
-            with open(self.log_file, 'w') as f:
-                f.write("=== MAFIA GAME OBSERVER LOG ===\n")
-                f.write(f"Game started at: {datetime.now().isoformat()}\n\n")
+        
+        # Opt-in: identical prompts reuse the stored response instead of calling the LLM again.
+        # The cache file lives outside the per-game folders so later games pick it up. An interface
+        # shared with other games keeps the cache it has; replacing it would drop their entries.
+        self.cache_llm_responses = cache_llm_responses
+        if self.cache_llm_responses and not self.llm.response_cache_enabled:
+            self.llm.enable_response_cache(llm_cache_path)
+        
+        # Observer and debug messages: tagged on stdout, plain in the log file
+        self.logger = logging.LoggerAdapter(_LOGGER, {"game": self.game_log_dir})
+        self._log_handlers: List[logging.Handler] = []
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(_PrefixFormatter({logging.INFO: "🔍 [OBSERVER] ", logging.DEBUG: "🐛 [DEBUG] "}))
+        self._add_log_handler(console)
+        if self.observer_mode or self.debug_mode:
+            with open(self.log_file, 'w', encoding='utf-8') as f:
+                if self.observer_mode:
+                    f.write("=== MAFIA GAME OBSERVER LOG ===\n")
+                    f.write(f"Game started at: {datetime.now().isoformat()}\n\n")
+            # FileHandler keeps the file open for the whole game and flushes each record
+            log_file_handler = logging.FileHandler(self.log_file, mode='a', encoding='utf-8')
+            log_file_handler.setFormatter(_PrefixFormatter({logging.DEBUG: "DEBUG: "}))
+            self._add_log_handler(log_file_handler)
+    
+    def _add_log_handler(self, handler: logging.Handler):
+        """Attach handler to the shared logger for this game's records only"""
+        game = self.game_log_dir
+        handler.setLevel(logging.DEBUG if self.debug_mode else logging.INFO)
+        handler.addFilter(lambda record: getattr(record, "game", None) == game)
+        _LOGGER.addHandler(handler)
+        self._log_handlers.append(handler)
+    
+    def close(self):
+        """Flush and release the log files and save the response cache. Call once the game and its logs are finished."""
+        if self._context_log_thread.is_alive():
+            self._context_log_queue.put(None)
+            self._context_log_thread.join()
+        if self.cache_llm_responses:
+            self.llm.save_response_cache()
+        for handler in self._log_handlers:
+            _LOGGER.removeHandler(handler)
+            handler.close()
+        self._log_handlers.clear()
+    
+    def _broadcast(self, player_lines: Sequence[str] = (), observer_lines: Sequence[str] = ()):
+        """Show lines to players (one print) and observers (one log record per line)"""
+        if self._channels["player"] and player_lines:
+            print("\n".join(player_lines))
+        if self._channels["observer"]:
+            for line in observer_lines:
+                self.logger.info(line)
+    
+    def _log(self, message: str, *observer_lines: str):
+        """Print message and log it for observers, as observer_lines if given, else without its newlines"""
+        print(message)
+        self._broadcast(observer_lines=observer_lines or (message.replace("\n", ""),))
     
     def _player_announce(self, message: str):
         """Announcement that players in the game would see"""
         if not self.observer_only:
             print(message)
     
-    def _observer_info(self, message: str):
-        """Internal information for external observers"""
+    def _observer_info(self, message: str, *args):
+        """Internal information for external observers. With args, message is %-formatted only if it is shown."""
         if self.observer_mode:
-            observer_msg = f"🔍 [OBSERVER] {message}"
-            print(observer_msg)
-            
-            # Log to file (clean format without timestamp and tag)
-            if self.log_file:
-                with open(self.log_file, 'a') as f:
-                    f.write(f"{message}\n")
+            self.logger.info(message, *args)
     
-    def _debug_info(self, message: str):
+    def _debug_info(self, message: str, *args):
         """Debug information for development"""
         if self.debug_mode:
-            debug_msg = f"🐛 [DEBUG] {message}"
-            print(debug_msg)
-            
-            # Log debug to file too (clean format)
-            if self.log_file:
-                with open(self.log_file, 'a') as f:
-                    f.write(f"DEBUG: {message}\n")
+            self.logger.debug(message, *args)
     
     def initialize_game(self):
         """Set up players with roles and create agent instances"""
-        init_msg = "🎮 Initializing Mafia Game..."
-        print(init_msg)
-        self._observer_info(init_msg.replace("🎮 ", ""))
+        self._log("🎮 Initializing Mafia Game...", "Initializing Mafia Game...")
         
         # Create players from personalities
         player_names = list(AGENT_PERSONALITIES.keys())
         
-        # Create dynamic role distribution based on num_mafia
-        total_players = len(player_names)
-        roles = (["mafia"] * self.num_mafia + 
-                ["doctor", "detective"] + 
-                ["villager"] * (total_players - self.num_mafia - 2))
-        random.shuffle(roles)
-        
-        for i, name in enumerate(player_names):
-            personality = AGENT_PERSONALITIES[name]["personality"]
-            role = Role(roles[i])
+        # Deal roles from a shuffled roster: first num_mafia are Mafia, then Doctor, then Detective
+        remaining = list(player_names)
+        random.shuffle(remaining)
+        mafia = set(remaining[:self.num_mafia])
+        doctor = remaining[self.num_mafia]
+        detective = remaining[self.num_mafia + 1]
+        
+        for name in player_names:
+            personality = AGENT_PERSONALITIES[name].personality
+            if name in mafia:
+                role = Role.MAFIA
+            elif name == doctor:
+                role = Role.DOCTOR
+            elif name == detective:
+                role = Role.DETECTIVE
+            else:
+                role = Role.VILLAGER
             player = Player(name=name, personality=personality, role=role)
-            self.game_state.players.append(player)
-            self.game_state.alive_players.append(name)
+            self.game_state.add_player(player)
             
             # Create appropriate agent
             if role == Role.MAFIA:
-                agent = MafiaAgent(name, personality, self.llm)
+                agent = MafiaAgent(name, personality, self.llm, samples=self.mafia_samples)
             elif role == Role.DOCTOR:
                 agent = DoctorAgent(name, personality, self.llm)
             elif role == Role.DETECTIVE:
                 agent = DetectiveAgent(name, personality, self.llm)
             else:
-                agent = VillagerAgent(name, personality, self.llm)
+                agent = VillagerAgent(name, personality, self.llm, routine_llm=self.villager_llm)
             
             self.agents[name] = agent
+            self.agents_by_role[role].append(agent)
         
         # Set up mafia knowledge
         self.game_state.mafia_members = [p.name for p in self.game_state.players if p.role == Role.MAFIA]
+        self.game_state.mafia_team_str = ", ".join(self.game_state.mafia_members)
         
         self._log_game_setup()
     
@@ -112,37 +246,26 @@ class GameOrchestrator:
         setup_msg = f"\n📋 Game Setup Complete!"
         players_msg = f"Players: {len(self.game_state.players)}"
         roles_msg = "🎲 Random role assignments:"
-        mafia_msg = f"Mafia team: {', '.join(self.game_state.mafia_members)}"
+        mafia_msg = f"Mafia team: {self.game_state.mafia_team_str}"
         separator = "=" * 50
         
-        print(setup_msg)
-        print(players_msg)
-        print(roles_msg)
-        for player in self.game_state.players:
-            role_assign = f"  • {player.name} ({player.role.value})"
-            print(role_assign)
-        print(mafia_msg)
-        print(separator)
+        role_assigns = [f"  • {player.name} ({player.role_name})" for player in self.game_state.players]
+        
+        print("\n".join([setup_msg, players_msg, roles_msg, *role_assigns, mafia_msg, separator]))
         
         # Log to observer file
-        self._observer_info(setup_msg.replace("\n📋 ", ""))
-        self._observer_info(players_msg)
-        self._observer_info(roles_msg.replace("🎲 ", ""))
-        for player in self.game_state.players:
-            self._observer_info(f"  • {player.name} ({player.role.value})")
-        self._observer_info(mafia_msg)
-        self._observer_info(separator)
+        self._broadcast(observer_lines=[setup_msg.replace("\n📋 ", ""), players_msg, roles_msg.replace("🎲 ", ""),
+                                        *role_assigns, mafia_msg, separator])
     
-    def play_game(self) -> str:
-        """Main game loop"""
+    async def play_game(self) -> str:
+        """Main game loop. Run it with asyncio.run(); agents' LLM calls within a phase are awaited together."""
         # Context logging directory is already set up in __init__
         self.context_log_dir = self.game_log_dir
         
         while not self.game_state.winner:
-            night_msg = f"\n🌙 Round {self.game_state.round_number} - Night Phase"
-            print(night_msg)
-            self._observer_info(night_msg.replace("\n🌙 ", ""))
-            self._run_night_phase()
+            round_msg = f"Round {self.game_state.round_number} - Night Phase"
+            self._log(f"\n🌙 {round_msg}", round_msg)
+            await self._run_night_phase()
             
             # Check win condition after night
             winner = self.game_state.check_win_condition()
@@ -150,7 +273,7 @@ class GameOrchestrator:
                 self.game_state.winner = winner
                 break
             
-            self._run_day_phase()
+            await self._run_day_phase()
             
             # Check win condition after day
             winner = self.game_state.check_win_condition()
@@ -160,9 +283,19 @@ class GameOrchestrator:
             
             self.game_state.round_number += 1
         
+        self._context_cache.clear()
         return self._announce_winner()
     
-    def _run_night_phase(self):
+    def _ctx(self, agent: BaseAgent) -> str:
+        """Agent's full base context, rebuilt only when the game state has changed"""
+        key = (self.game_state.version, self.game_state.phase, self.game_state.round_number)
+        cached = self._context_cache.get(agent.name)
+        if cached is None or cached[0] != key:
+            cached = (key, agent.get_base_context(self.game_state))
+            self._context_cache[agent.name] = cached
+        return cached[1]
+    
+    async def _run_night_phase(self):
         """Execute night phase: Mafia kill, Doctor save, Detective investigate"""
         self.game_state.phase = GamePhase.NIGHT
         
@@ -171,104 +304,118 @@ class GameOrchestrator:
         self.game_state.doctor_save = None
         self.game_state.detective_check = None
         
+        # Night decisions are independent, so ask every role at once
+        decisions = await self._collect_night_decisions()
+        
         # 1. Mafia decides who to kill
-        self._mafia_night_action()
+        self._mafia_night_action(decisions)
         
         # 2. Doctor saves someone
-        self._doctor_night_action()
+        self._doctor_night_action(decisions)
         
         # 3. Detective investigates someone
-        self._detective_night_action()
+        self._detective_night_action(decisions)
         
         # 4. Resolve night actions
         self._resolve_night_actions()
     
-    def _mafia_night_action(self):
+    def _get_night_agents(self):
+        """Alive Mafia agents, plus the alive Doctor and Detective (or None)"""
+        alive_set = self.game_state.alive_set
+        mafia_agents = [agent for agent in self.agents_by_role[Role.MAFIA] if agent.name in alive_set]
+        doctor = next((agent for agent in self.agents_by_role[Role.DOCTOR] if agent.name in alive_set), None)
+        detective = next((agent for agent in self.agents_by_role[Role.DETECTIVE] if agent.name in alive_set), None)
+        return mafia_agents, doctor, detective
+    
+    async def _collect_night_decisions(self) -> Dict[str, Optional[NightDecision]]:
+        """Get every night decision concurrently. Returns agent name -> decision."""
+        mafia_agents, doctor, detective = self._get_night_agents()
+        night_agents = [(agent, "Mafia") for agent in mafia_agents]
+        if doctor:
+            night_agents.append((doctor, "Doctor"))
+        if detective:
+            night_agents.append((detective, "Detective"))
+        
+        if not night_agents:
+            return {}
+        
+        async def get_night_decision(agent, role_label):
+            # Log night action context
+            context = self._ctx(agent)
+            self._log_agent_context(agent.name, context, f"Round {self.game_state.round_number} {role_label} Night Action")
+            return await agent.make_night_decision(self.game_state)
+        
+        decisions = await asyncio.gather(*(get_night_decision(agent, role_label) for agent, role_label in night_agents))
+        return {agent.name: decision for (agent, _), decision in zip(night_agents, decisions)}
+    
+    def _mafia_night_action(self, decisions: Dict[str, Optional[NightDecision]]):
         """Handle Mafia consensus for elimination"""
-        mafia_agents = [self.agents[name] for name in self.game_state.mafia_members 
-                       if name in self.game_state.alive_players]
+        mafia_agents, _, _ = self._get_night_agents()
         
         if not mafia_agents:
             return
         
         self._observer_info("🔪 Mafia discussing elimination...")
         
-        # Get proposals from each Mafia member
+        # Proposals from each Mafia member, in team order so consensus ties break the same way
         proposals = {}
         for agent in mafia_agents:
-            # Log night action context
-            context = agent.get_base_context(self.game_state)
-            self._log_agent_context(agent.name, context, f"Round {self.game_state.round_number} Mafia Night Action")
-            
-            decision = agent.make_night_decision(self.game_state)
-            if decision and 'target' in decision:
-                target = decision['target']
-                reason = decision.get('reason', 'No reason given')
+            decision = decisions.get(agent.name)
+            if decision and decision.target:
+                target = decision.target
+                reason = decision.reason or 'No reason given'
                 proposals[agent.name] = {'target': target, 'reason': reason}
-                self._observer_info(f"  {agent.name} proposes: {target} ({reason})")
+                self._observer_info("  %s proposes: %s (%s)", agent.name, target, reason)
                 
                 # Track individual Mafia action
                 self._track_player_night_action(agent.name, "mafia_propose", target, reason)
         
         # Try to reach consensus
         if proposals:
-            target_votes = Counter([p['target'] for p in proposals.values()])
-            most_common = target_votes.most_common(1)
-            if most_common:
-                self.game_state.mafia_target = most_common[0][0]
-                self._observer_info(f"  🎯 Mafia consensus: Eliminate {self.game_state.mafia_target}")
+            tally = {}  # target -> number of proposals
+            for p in proposals.values():
+                tally[p['target']] = tally.get(p['target'], 0) + 1
+            # First-proposed target wins ties
+            self.game_state.mafia_target = max(tally, key=tally.get)
+            self._observer_info("  🎯 Mafia consensus: Eliminate %s", self.game_state.mafia_target)
     
-    def _doctor_night_action(self):
+    def _doctor_night_action(self, decisions: Dict[str, Optional[NightDecision]]):
         """Handle Doctor save action"""
-        doctor_agents = [agent for agent in self.agents.values() 
-                        if agent.role == Role.DOCTOR and agent.name in self.game_state.alive_players]
+        _, doctor, _ = self._get_night_agents()
         
-        if not doctor_agents:
+        if not doctor:
             return
         
-        doctor = doctor_agents[0]
-        
-        # Log Doctor night action context
-        context = doctor.get_base_context(self.game_state)
-        self._log_agent_context(doctor.name, context, f"Round {self.game_state.round_number} Doctor Night Action")
-        
-        decision = doctor.make_night_decision(self.game_state)
-        if decision and 'target' in decision:
-            self.game_state.doctor_save = decision['target']
-            reason = decision.get('reason', 'No reason given')
-            self._observer_info(f"🏥 Doctor saves: {self.game_state.doctor_save} ({reason})")
+        decision = decisions.get(doctor.name)
+        if decision and decision.target:
+            self.game_state.doctor_save = decision.target
+            reason = decision.reason or 'No reason given'
+            self._observer_info("🏥 Doctor saves: %s (%s)", self.game_state.doctor_save, reason)
             
             # Track Doctor action
-            self._track_player_night_action(doctor.name, "doctor_save", decision['target'], reason)
+            self._track_player_night_action(doctor.name, "doctor_save", decision.target, reason)
     
-    def _detective_night_action(self):
+    def _detective_night_action(self, decisions: Dict[str, Optional[NightDecision]]):
         """Handle Detective investigation"""
-        detective_agents = [agent for agent in self.agents.values() 
-                           if agent.role == Role.DETECTIVE and agent.name in self.game_state.alive_players]
+        _, _, detective = self._get_night_agents()
         
-        if not detective_agents:
+        if not detective:
             return
         
-        detective = detective_agents[0]
-        
-        # Log Detective night action context
-        context = detective.get_base_context(self.game_state)
-        self._log_agent_context(detective.name, context, f"Round {self.game_state.round_number} Detective Night Action")
-        
-        decision = detective.make_night_decision(self.game_state)
-        if decision and 'target' in decision:
-            target = decision['target']
+        decision = decisions.get(detective.name)
+        if decision and decision.target:
+            target = decision.target
             self.game_state.detective_check = target
             
             # Reveal the target's role to detective
             target_player = self.game_state.get_player_by_name(target)
             if target_player:
-                self.game_state.detective_results[target] = target_player.role.value
-                self._observer_info(f"🔍 Detective investigates: {target} (Role: {target_player.role.value})")
+                self.game_state.record_detective_result(target, target_player.role_name)
+                self._observer_info("🔍 Detective investigates: %s (Role: %s)", target, target_player.role_name)
                 
                 # Track Detective action
-                reason = decision.get('reason', 'No reason given')
-                self._track_player_night_action(detective.name, "detective_investigate", target, f"{reason} (found: {target_player.role.value})")
+                reason = decision.reason or 'No reason given'
+                self._track_player_night_action(detective.name, "detective_investigate", target, f"{reason} (found: {target_player.role_name})")
     
     def _resolve_night_actions(self):
         """Resolve night phase outcomes"""
@@ -278,21 +425,21 @@ class GameOrchestrator:
             # Check if doctor saved the target
             if self.game_state.mafia_target == self.game_state.doctor_save:
                 # Players only know no one died, not who was saved or that there was a save
-                self._player_announce(f"🌅 No one was eliminated during the night")
-                self._observer_info(f"Doctor's save prevented {self.game_state.mafia_target} from being eliminated")
+                self._broadcast([f"🌅 No one was eliminated during the night"],
+                                [f"Doctor's save prevented {self.game_state.mafia_target} from being eliminated"])
                 self._add_action("night_save", f"{self.game_state.mafia_target} was saved from elimination")
             else:
                 # Player is eliminated
                 eliminated = self.game_state.mafia_target
                 self._eliminate_player(eliminated)
-                self._player_announce(f"💀 {eliminated} was eliminated during the night")
-                self._observer_info(f"Mafia successfully eliminated {eliminated}")
+                self._broadcast([f"💀 {eliminated} was eliminated during the night"],
+                                [f"Mafia successfully eliminated {eliminated}"])
         
         # Log night summary
         self._add_action("night_summary", f"Night {self.game_state.round_number} completed. " + 
                         (f"{eliminated} eliminated" if eliminated else "No one eliminated"))
     
-    def _run_day_phase(self):
+    async def _run_day_phase(self):
         """Execute day phase: Discussion, voting (up to 3 rounds)"""
         self.game_state.phase = GamePhase.DAY_DISCUSSION
         
@@ -302,80 +449,96 @@ class GameOrchestrator:
             self.game_state.winner = winner
             return
         
+        # No one is eliminated until the end of voting, so the alive list holds for the whole day
+        alive = self.game_state.get_alive_players()
+        alive_names = [p.name for p in alive]
+        
         # Announce day and any eliminations
-        self._announce_day_start()
+        self._announce_day_start(alive, alive_names)
         
         # Discussion rounds
-        self._run_discussion_phase()
+        await self._run_discussion_phase(alive_names)
         
         # Voting phase
-        self._run_voting_phase()
+        await self._run_voting_phase(alive_names)
     
-    def _announce_day_start(self):
+    def _announce_day_start(self, alive: List[Player], alive_names: List[str]):
         """Announce the start of day and any eliminations"""
-        # Add day phase header to match night phase format with newline
-        self._observer_info("")  # Add blank line before day phase
+        # Add day phase header to match night phase format with newline (blank line first)
         day_msg = f"Round {self.game_state.round_number} - Day Phase"
-        self._observer_info(day_msg)
-        
-        alive_players = [p.name for p in self.game_state.get_alive_players()]
-        self._player_announce(f"🌅 Day {self.game_state.round_number} begins")
-        self._player_announce(f"Players remaining: {', '.join(alive_players)}")
+        self._broadcast(observer_lines=["", day_msg])
         
         # Observer gets additional details
-        alive_with_roles = [(p.name, p.role.value) for p in self.game_state.get_alive_players()]
-        self._observer_info(f"Players remaining with roles: {alive_with_roles}")
+        alive_with_roles = [(p.name, p.role_name) for p in alive]
+        self._broadcast([f"🌅 Day {self.game_state.round_number} begins", f"Players remaining: {', '.join(alive_names)}"],
+                        [f"Players remaining with roles: {alive_with_roles}"])
         
         if self.game_state.elimination_history:
             last_eliminated = self.game_state.elimination_history[-1]
             self._player_announce(f"💀 Last night: {last_eliminated} was eliminated")
     
-    def _run_discussion_phase(self):
+    async def _run_discussion_phase(self, alive_names: List[str]):
         """Run natural discussion with reactive responses"""
         self._player_announce(f"\n💬 Discussion Phase")
         
         # Reset speaking counts for this discussion round
-        self.speaking_counts = {name: 0 for name in self.game_state.alive_players}
+        self.speaking_counts = {name: 0 for name in alive_names}
+        self.last_urgency = {}
+        self.last_spoke_round = {}
+        self.silent_streaks = {}
+        self.next_query_round = {}
         
-        alive_agents = [agent for agent in self.agents.values() 
-                       if agent.name in self.game_state.alive_players]
+        alive_agents = [self.agents[name] for name in alive_names]
         
         total_rounds = 0
+        sub_round = 0
         consecutive_silent_rounds = 0
         max_total_rounds = self.max_discussion_rounds * len(alive_agents)
         
         while total_rounds < max_total_rounds and consecutive_silent_rounds < 3:
-            # Get responses from all agents with urgency in parallel
-            agent_responses = []
+            sub_round += 1
+            
+            # Get responses with urgency from the agents worth asking this sub-round
+            queried_agents = [agent for agent in alive_agents if self._should_query(agent, sub_round)]
+            
+            # Every agent sees the same public state this sub-round; render it once
+            shared_block = self.game_state.build_shared_context_block()
             
-            def get_agent_response(agent):
+            prompted = []  # (agent, prompt)
+            for agent in queried_agents:
+                # Agents the urgency gate passes over aren't recorded at all, so a lost roll doesn't count toward backoff
+                if not agent.should_attempt_speak(self.game_state):
+                    continue
                 try:
                     # Log the context being passed to this agent
-                    context = agent.get_base_context(self.game_state)
+                    context = self._ctx(agent)
                     self._log_agent_context(agent.name, context, f"Round {self.game_state.round_number} Discussion")
                     
-                    response = agent.participate_in_discussion(self.game_state)
-                    return (agent, response)
+                    prompt = agent.build_discussion_prompt(self.game_state, shared_block=shared_block)
                 except Exception as e:
-                    self._observer_info(f"Error getting response from {agent.name}: {e}")
-                    return (agent, None)
+                    self._observer_info("Error getting response from %s: %s", agent.name, e)
+                    continue
+                if prompt is not None:
+                    prompted.append((agent, prompt))
             
-            # Use ThreadPoolExecutor for parallel calls
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                future_to_agent = {executor.submit(get_agent_response, agent): agent for agent in alive_agents}
-                
-                for future in as_completed(future_to_agent):
-                    agent, response = future.result()
-                    if response and hasattr(response, 'speak') and hasattr(response, 'urgency'):
-                        agent_responses.append((agent, response))
-                    elif response:  # Handle old format for backward compatibility
-                        from structured_responses import DiscussionResponse
-                        new_response = DiscussionResponse(speak=True, comment=response, urgency=3)
-                        agent_responses.append((agent, new_response))
+            # Query them all at once: one batch per LLM the agents talk to
+            by_llm: Dict[LLMInterface, List[int]] = {}  # llm -> indexes into prompted
+            for i, (agent, _) in enumerate(prompted):
+                by_llm.setdefault(agent.routine_llm, []).append(i)
+            batches = await asyncio.gather(*(
+                llm.abatch_structured_response([(prompted[i][1], DiscussionResponse, prompted[i][0].get_static_prefix()) for i in indexes],
+                                               max_tokens=DISCUSSION_MAX_TOKENS, abort_on=DISCUSSION_ABORT_ON)
+                for llm, indexes in by_llm.items()))
+            responses = [None] * len(prompted)
+            for indexes, batch in zip(by_llm.values(), batches):
+                for i, response in zip(indexes, batch):
+                    responses[i] = response
+            agent_responses = [(agent, response) for (agent, _), response in zip(prompted, responses) if response]
             
             # Filter agents who want to speak and apply frequency penalty to urgency
             speaking_agents = []
             for agent, resp in agent_responses:
+                self._record_discussion_response(agent.name, resp, sub_round)
                 if resp.speak:
                     # Apply frequency penalty: reduce urgency based on how much they've spoken
                     speak_count = self.speaking_counts.get(agent.name, 0)
@@ -390,7 +553,7 @@ class GameOrchestrator:
                 consecutive_silent_rounds += 1
                 if consecutive_silent_rounds < 3:
                     self._player_announce("...")
-                self._observer_info(f"No one chose to speak this round (silence #{consecutive_silent_rounds})")
+                self._observer_info("No one chose to speak this round (silence #%d)", consecutive_silent_rounds)
                 continue
             else:
                 consecutive_silent_rounds = 0
@@ -400,36 +563,57 @@ class GameOrchestrator:
             
             # Update speaking count
             self.speaking_counts[agent.name] = self.speaking_counts.get(agent.name, 0) + 1
+            self.last_spoke_round[agent.name] = sub_round
             
-            self._player_announce(f"{agent.name}: {response.comment}")
-            self._observer_info(f"{agent.name} ({agent.role.value}): {response.comment}")
+            self._broadcast([f"{agent.name}: {response.comment}"],
+                            [f"{agent.name} ({agent.role_name}): {response.comment}"])
             
             action = GameAction(
                 player_name=agent.name,
                 action_type="discussion",
                 message=response.comment,
-                timestamp=datetime.now().isoformat(),
+                timestamp_ns=time.time_ns(),
                 round_number=self.game_state.round_number
             )
-            self.game_state.discussion_messages.append(action)
+            self.game_state.add_discussion_message(action)
             
             total_rounds += 1
             
             # Brief pause between messages to simulate natural conversation
-            if len(speaking_agents) > 1:
-                import time
-                time.sleep(0.5)  # Small delay for readability
+            if self.interactive_pacing and len(speaking_agents) > 1:
+                time.sleep(self._pacing_s)  # Small delay for readability
+    
+    def _should_query(self, agent: BaseAgent, sub_round: int) -> bool:
+        """Whether to ask an agent if they want to speak this sub-round"""
+        # Someone under attack always gets the chance to respond
+        if agent.is_being_attacked(self.game_state):
+            return True
+        if sub_round < self.next_query_round.get(agent.name, 0):
+            return False
+        return (self.speaking_counts.get(agent.name, 0) == 0
+                or self.last_urgency.get(agent.name, 3) >= 3
+                or sub_round - self.last_spoke_round.get(agent.name, 0) >= 2)
     
-    def _run_voting_phase(self):
+    def _record_discussion_response(self, name: str, response: DiscussionResponse, sub_round: int):
+        self.last_urgency[name] = response.urgency
+        if response.speak:
+            self.silent_streaks[name] = 0
+            return
+        
+        # Back off agents who keep declining: skip 1, then 2, then 4 sub-rounds
+        streak = self.silent_streaks.get(name, 0) + 1
+        self.silent_streaks[name] = streak
+        if streak >= 2:
+            self.next_query_round[name] = sub_round + 1 + min(2 ** (streak - 2), 4)
+    
+    async def _run_voting_phase(self, alive_players: List[str]):
         """Run voting phase with defense and final voting"""
         self.game_state.phase = GamePhase.DAY_VOTING
         self.game_state.reset_votes()
         
-        self._player_announce(f"\n🗳️ Voting Phase")
-        self._observer_info("")  # Add blank line for better separation
-        self._observer_info("Starting voting phase")
+        self._broadcast([f"\n🗳️ Voting Phase"],
+                        ["", "Starting voting phase"])
         
-        alive_players = [p.name for p in self.game_state.get_alive_players()]
         voting_round = 1
         
         while voting_round <= 3:  # Maximum 3 voting rounds
@@ -440,79 +624,40 @@ class GameOrchestrator:
                 'votes': [],
                 'final_votes': []
             }
-            self._player_announce(f"\n--- Voting Round {voting_round} ---")
-            self._observer_info("")  # Add blank line before each voting round
-            self._observer_info(f"Voting round {voting_round} starting")
+            self._broadcast([f"\n--- Voting Round {voting_round} ---"],
+                            ["", f"Voting round {voting_round} starting"])
             
             # Reset votes for new round
             self.game_state.reset_votes()
             
-            # Voting round
+            # Voting round: everyone votes at once, results are applied in seating order
             vote_reasons = {}  # Store reasons for this round
-            for agent_name in alive_players:
-                agent = self.agents[agent_name]
+            for agent_name, vote_target, vote_reason in await self._gather_votes(alive_players, self._build_vote_prompt, self._resolve_vote, "Initial Voting"):
+                if vote_target is None:
+                    continue
                 
-                # Create candidates list excluding the voting agent (can't vote for themselves)
-                candidates = [p for p in alive_players if p != agent_name]
+                self.game_state.record_vote(agent_name, vote_target)
+                vote_reasons[agent_name] = vote_reason
                 
-                # Log the voting context
-                context = agent.get_base_context(self.game_state)
-                self._log_agent_context(agent_name, context, f"Round {self.game_state.round_number} Initial Voting")
+                # Track vote in history
+                current_voting_round['votes'].append({
+                    'voter': agent_name,
+                    'target': vote_target,
+                    'reason': vote_reason
+                })
                 
-                vote_result = agent.vote(self.game_state, candidates)
-                
-                # Handle both old format (string) and new format (dict) for backwards compatibility
-                if isinstance(vote_result, dict):
-                    vote_target = vote_result["target"]
-                    vote_reason = vote_result["reason"]
-                else:
-                    vote_target = vote_result
-                    vote_reason = "No reason given"
-                
-                # Validate vote target is valid (in candidates list, not self)
-                if vote_target in candidates:
-                    self.game_state.votes[agent_name] = vote_target
-                    self.game_state.vote_counts[vote_target] = self.game_state.vote_counts.get(vote_target, 0) + 1
-                    vote_reasons[agent_name] = vote_reason
-                    
-                    # Track vote in history
-                    current_voting_round['votes'].append({
-                        'voter': agent_name,
-                        'target': vote_target,
-                        'reason': vote_reason
-                    })
-                    
-                    self._player_announce(f"  {agent_name} votes for {vote_target}: {vote_reason}")
-                    self._observer_info(f"{agent_name} ({agent.role.value}) votes for {vote_target}: {vote_reason}")
-                elif vote_target == agent_name:
-                    # Prevent self-voting - choose first available candidate
-                    fallback_target = candidates[0] if candidates else None
-                    if fallback_target:
-                        self.game_state.votes[agent_name] = fallback_target
-                        self.game_state.vote_counts[fallback_target] = self.game_state.vote_counts.get(fallback_target, 0) + 1
-                        vote_reasons[agent_name] = f"Cannot vote for self, voting {fallback_target} instead"
-                        vote_target = fallback_target
-                        
-                        # Track vote in history
-                        current_voting_round['votes'].append({
-                            'voter': agent_name,
-                            'target': vote_target,
-                            'reason': vote_reasons[agent_name]
-                        })
-                        
-                        self._player_announce(f"  {agent_name} votes for {vote_target}: {vote_reasons[agent_name]}")
-                        self._observer_info(f"{agent_name} ({agent.role.value}) votes for {vote_target}: {vote_reasons[agent_name]}")
+                self._broadcast([f"  {agent_name} votes for {vote_target}: {vote_reason}"],
+                                [f"{agent_name} ({self.agents[agent_name].role_name}) votes for {vote_target}: {vote_reason}"])
             
             # Determine who's on trial (most votes)
             if self.game_state.vote_counts:
-                max_votes = max(self.game_state.vote_counts.values())
-                suspects = [name for name, votes in self.game_state.vote_counts.items() if votes == max_votes]
+                max_votes, suspects = self.game_state.top_votes, list(self.game_state.top_voted)
                 self.game_state.suspects_on_trial = suspects
                 
                 if len(suspects) == 1:
                     suspect = suspects[0]
-                    self._player_announce(f"\n⚖️ {suspect} receives the most votes ({max_votes}) and is on trial!")
-                    self._observer_info(f"{suspect} on trial with {max_votes} votes ({self.agents[suspect].role.value})")
+                    self._broadcast([f"\n⚖️ {suspect} receives the most votes ({max_votes}) and is on trial!"],
+                                    [f"{suspect} on trial with {max_votes} votes ({self.agents[suspect].role_name})"])
                     
                     # Track trial
                     current_voting_round['trial_candidate'] = suspect
@@ -526,27 +671,27 @@ class GameOrchestrator:
                             self._player_announce(f"  - {reason}")
                     
                     # Run defense phase
-                    defense = self._run_defense_phase(suspect)
+                    defense = await self._run_defense_phase(suspect)
                     current_voting_round['defense'] = defense
                     
                     # Run final voting (normal voting, not YES/NO)
-                    eliminated = self._run_final_voting(suspect, alive_players, current_voting_round)
+                    eliminated = await self._run_final_voting(suspect, alive_players, current_voting_round)
                     if eliminated:
                         current_voting_round['eliminated'] = eliminated
-                        self.game_state.voting_history.append(current_voting_round)
+                        self.game_state.add_voting_round(current_voting_round)
                         return  # Someone was eliminated, exit voting phase
                 else:
-                    self._player_announce(f"\n🤝 Tie between: {', '.join(suspects)} with {max_votes} votes each")
-                    self._observer_info(f"Tie in round {voting_round}: {suspects} with {max_votes} votes each")
+                    self._broadcast([f"\n🤝 Tie between: {', '.join(suspects)} with {max_votes} votes each"],
+                                    [f"Tie in round {voting_round}: {suspects} with {max_votes} votes each"])
                     
                     # Record this tied voting round in history
                     current_voting_round['tied_candidates'] = suspects
                     current_voting_round['tie_votes'] = max_votes
-                    self.game_state.voting_history.append(current_voting_round)
+                    self.game_state.add_voting_round(current_voting_round)
                     
                     if voting_round == 3:
-                        self._player_announce("After 3 rounds of voting, still tied. No one is eliminated.")
-                        self._observer_info("No elimination due to 3-round tie")
+                        self._broadcast(["After 3 rounds of voting, still tied. No one is eliminated."],
+                                        ["No elimination due to 3-round tie"])
                         return
                     else:
                         self._player_announce(f"Proceeding to voting round {voting_round + 1}")
@@ -554,92 +699,45 @@ class GameOrchestrator:
             voting_round += 1
             
         # If we exit the loop without finding a winner, no elimination
-        self._player_announce("No votes cast - no elimination.")
-        self._observer_info("No votes cast in voting phase")
+        self._broadcast(["No votes cast - no elimination."],
+                        ["No votes cast in voting phase"])
     
-    def _run_defense_phase(self, suspect: str) -> str:
+    async def _run_defense_phase(self, suspect: str) -> str:
         """Allow suspect to defend themselves. Returns the defense text."""
         self.game_state.phase = GamePhase.DAY_DEFENSE
         
-        self._player_announce(f"\n🛡️ Defense Phase - {suspect} defends themselves:")
-        self._observer_info("")  # Add blank line before defense phase
-        self._observer_info(f"{suspect} defense phase starting")
+        self._broadcast([f"\n🛡️ Defense Phase - {suspect} defends themselves:"],
+                        ["", f"{suspect} defense phase starting"])
         agent = self.agents[suspect]
         
         # Log defense context
-        context = agent.get_base_context(self.game_state)
+        context = self._ctx(agent)
         self._log_agent_context(suspect, context, f"Round {self.game_state.round_number} Defense")
         
-        defense = agent.defend_self(self.game_state)
-        self._player_announce(f"  {suspect}: {defense}")
-        self._observer_info(f"{suspect} ({agent.role.value}) defense: {defense}")
+        defense = await agent.defend_self(self.game_state)
+        self._broadcast([f"  {suspect}: {defense}"],
+                        [f"{suspect} ({agent.role_name}) defense: {defense}"])
         
         self._add_action("defense", f"{suspect} defended: {defense}")
         return defense
     
-    def _run_final_voting(self, suspect: str, alive_players: List[str], voting_round_data: Dict) -> Optional[str]:
+    async def _run_final_voting(self, suspect: str, alive_players: List[str], voting_round_data: Dict) -> Optional[str]:
         """Final voting after defense. Returns eliminated player name or None."""
         self.game_state.phase = GamePhase.DAY_FINAL_VOTING
         
-        self._player_announce(f"\n🗳️ Final Vote - After hearing {suspect}'s defense")
-        self._player_announce("You may vote for the same person or change your vote based on the defense.")
-        self._observer_info("")  # Add blank line before final voting phase
-        self._observer_info(f"Final voting phase after {suspect}'s defense")
+        self._broadcast([f"\n🗳️ Final Vote - After hearing {suspect}'s defense",
+                         "You may vote for the same person or change your vote based on the defense."],
+                        ["", f"Final voting phase after {suspect}'s defense"])
         
         # Reset votes for final round
         self.game_state.reset_votes()
         
         # Final voting round (normal voting with defense consideration)
         vote_reasons = {}
-        for agent_name in alive_players:
-            agent = self.agents[agent_name]
-            
-            # Create candidates list excluding the voting agent (can't vote for themselves)
-            candidates = [p for p in alive_players if p != agent_name]
-            
-            # Add instruction about considering the defense
-            prompt_addition = f"\n\nFINAL VOTING AFTER DEFENSE:\n{suspect} just defended themselves. Consider their defense when making your vote.\nYou can vote for the same person as before or change your vote."
-            
-            # Create a modified context for final voting
-            original_context = agent.get_base_context(self.game_state)
-            modified_context = original_context + prompt_addition
-            
-            # Log the final voting context
-            self._log_agent_context(agent_name, modified_context, f"Round {self.game_state.round_number} Final Voting")
-            
-            # Use the existing vote method but with modified context
-            from structured_responses import VoteDecision
-            
-            prompt = f"""{modified_context}
-
-FINAL VOTING PHASE
-
-Vote to eliminate one of: {', '.join(candidates)}
-
-After hearing {suspect}'s defense, who do you want to eliminate?
-Choose your target and provide a clear reason considering the defense."""
-
-            vote_decision = agent.llm.generate_structured_response(prompt, VoteDecision)
-            
-            # Validate target is in candidates (not self, not invalid)
-            if vote_decision.target in candidates:
-                vote_target = vote_decision.target
-            elif vote_decision.target == agent_name:
-                # Prevent self-voting - choose first available candidate
-                vote_target = candidates[0] if candidates else None
-                vote_decision.reason = f"Cannot vote for self, voting {vote_target} instead"
-            else:
-                # Target not found, try to find closest match
-                vote_target = candidates[0] if candidates else None
-                for candidate in candidates:
-                    if candidate.lower() in vote_decision.target.lower():
-                        vote_target = candidate
-                        break
-            
+        for agent_name, vote_target, vote_reason in await self._gather_votes(alive_players, self._build_final_vote_prompt, self._resolve_final_vote, suspect):
             if vote_target:
-                self.game_state.votes[agent_name] = vote_target
-                self.game_state.vote_counts[vote_target] = self.game_state.vote_counts.get(vote_target, 0) + 1
-                vote_reasons[agent_name] = vote_decision.reason
+                self.game_state.record_vote(agent_name, vote_target)
+                vote_reasons[agent_name] = vote_reason
             target_player = self.game_state.get_player_by_name(vote_target)
             if target_player:
                 target_player.votes_received += 1
@@ -648,42 +746,111 @@ Choose your target and provide a clear reason considering the defense."""
             voting_round_data['final_votes'].append({
                 'voter': agent_name,
                 'target': vote_target,
-                'reason': vote_decision.reason
+                'reason': vote_reason
             })
                 
-            self._player_announce(f"  {agent_name} votes for {vote_target}: {vote_decision.reason}")
-            self._observer_info(f"{agent_name} ({agent.role.value}) votes for {vote_target}: {vote_decision.reason}")
+            self._broadcast([f"  {agent_name} votes for {vote_target}: {vote_reason}"],
+                            [f"{agent_name} ({self.agents[agent_name].role_name}) votes for {vote_target}: {vote_reason}"])
         
         # Determine final elimination
         if self.game_state.vote_counts:
-            max_votes = max(self.game_state.vote_counts.values())
-            suspects = [name for name, votes in self.game_state.vote_counts.items() if votes == max_votes]
+            max_votes, suspects = self.game_state.top_votes, self.game_state.top_voted
             
             if len(suspects) == 1:
                 eliminated_player = suspects[0]
                 self._eliminate_player(eliminated_player)
-                self._player_announce(f"\n💀 {eliminated_player} is eliminated with {max_votes} votes!")
-                self._observer_info(f"{eliminated_player} eliminated in final vote ({self.agents[eliminated_player].role.value})")
+                self._broadcast([f"\n💀 {eliminated_player} is eliminated with {max_votes} votes!"],
+                                [f"{eliminated_player} eliminated in final vote ({self.agents[eliminated_player].role_name})"])
                 return eliminated_player
             else:
-                self._player_announce(f"\n🤝 Final vote tied between: {', '.join(suspects)} with {max_votes} votes each")
-                self._player_announce("No one is eliminated due to the tie.")
-                self._observer_info(f"Final vote tied: {suspects} with {max_votes} votes each - no elimination")
+                self._broadcast([f"\n🤝 Final vote tied between: {', '.join(suspects)} with {max_votes} votes each",
+                                 "No one is eliminated due to the tie."],
+                                [f"Final vote tied: {suspects} with {max_votes} votes each - no elimination"])
                 return None
         else:
-            self._player_announce("\nNo votes cast in final round - no elimination.")
-            self._observer_info("No votes in final round")
+            self._broadcast(["\nNo votes cast in final round - no elimination."],
+                            ["No votes in final round"])
             return None
     
+    async def _gather_votes(self, alive_players: List[str], build_prompt, resolve_vote, *args) -> List[Tuple[str, Optional[str], str]]:
+        """Collect every voter's vote concurrently. Results come back in alive_players order.
+        
+        build_prompt(voter, candidates, *args) returns the prompt sent after the voter's static prefix;
+        resolve_vote(voter, candidates, decision) turns the reply into (voter, target, reason).
+        """
+        ballots = []  # (voter, candidates)
+        prompts = []
+        for agent_name in alive_players:
+            # Create candidates list excluding the voting agent (can't vote for themselves)
+            candidates = [p for p in alive_players if p != agent_name]
+            ballots.append((agent_name, candidates))
+            prompts.append(build_prompt(agent_name, candidates, *args))
+        
+        # decide() samples the voters configured for it and sends everyone else's as a single request
+        decisions = await asyncio.gather(*(self.agents[agent_name].decide(prompt, VoteDecision, self.agents[agent_name].routine_llm)
+                                           for (agent_name, _), prompt in zip(ballots, prompts)))
+        return [resolve_vote(agent_name, candidates, decision) for (agent_name, candidates), decision in zip(ballots, decisions)]
+    
+    def _build_vote_prompt(self, agent_name: str, candidates: List[str], context_label: str) -> str:
+        agent = self.agents[agent_name]
+        
+        # Log the voting context
+        context = self._ctx(agent)
+        self._log_agent_context(agent_name, context, f"Round {self.game_state.round_number} {context_label}")
+        
+        return agent.build_vote_prompt(self.game_state, candidates)
+    
+    def _resolve_vote(self, agent_name: str, candidates: List[str], vote_decision: VoteDecision) -> Tuple[str, Optional[str], str]:
+        """Returns (voter, target or None if invalid, reason)"""
+        vote_decision = self.agents[agent_name].finalize_vote(vote_decision, candidates)
+        vote_target, vote_reason = vote_decision.target, vote_decision.reason
+        
+        # Validate vote target is valid (in candidates list, not self)
+        if vote_target in candidates:
+            return (agent_name, vote_target, vote_reason)
+        elif vote_target == agent_name and candidates:
+            # Prevent self-voting - choose first available candidate
+            fallback_target = candidates[0]
+            return (agent_name, fallback_target, f"Cannot vote for self, voting {fallback_target} instead")
+        return (agent_name, None, vote_reason)
+    
+    def _build_final_vote_prompt(self, agent_name: str, candidates: List[str], suspect: str) -> str:
+        """Vote prompt after the suspect's defense"""
+        agent = self.agents[agent_name]
+        
+        # Add instruction about considering the defense
+        prompt_addition = _FINAL_VOTE_NOTE_TMPL.format(suspect=suspect)
+        
+        # Create a modified context for final voting
+        original_context = self._ctx(agent)
+        modified_context = original_context + prompt_addition
+        
+        # Log the final voting context
+        self._log_agent_context(agent_name, modified_context, f"Round {self.game_state.round_number} Final Voting")
+        
+        # The static prefix goes out as its own message; only the rest changes per call
+        return _FINAL_VOTE_TMPL.format(context=agent.get_dynamic_suffix(self.game_state) + prompt_addition,
+                                       candidates=', '.join(candidates), suspect=suspect)
+    
+    def _resolve_final_vote(self, agent_name: str, candidates: List[str], vote_decision: VoteDecision) -> Tuple[str, Optional[str], str]:
+        """Returns (voter, target, reason)"""
+        vote_reason = vote_decision.reason
+        # Validate target is in candidates (not self, not invalid)
+        if vote_decision.target in candidates:
+            vote_target = vote_decision.target
+        elif vote_decision.target == agent_name:
+            # Prevent self-voting - choose first available candidate
+            vote_target = candidates[0] if candidates else None
+            vote_reason = f"Cannot vote for self, voting {vote_target} instead"
+        else:
+            # Target not found, try to find closest match
+            vote_target = closest_candidate(vote_decision.target, candidates) if candidates else None
+        
+        return (agent_name, vote_target, vote_reason)
+    
     def _eliminate_player(self, player_name: str):
         """Remove player from the game"""
-        player = self.game_state.get_player_by_name(player_name)
-        if player:
-            player.is_alive = False
-            self.game_state.alive_players.remove(player_name)
-            self.game_state.dead_players.append(player_name)
-            self.game_state.elimination_history.append(player_name)
-            
+        if self.game_state.eliminate_player(player_name):
             self._add_action("elimination", f"{player_name} was eliminated")
     
     def _add_action(self, action_type: str, message: str):
@@ -692,7 +859,7 @@ Choose your target and provide a clear reason considering the defense."""
             player_name="Game",
             action_type=action_type,
             message=message,
-            timestamp=datetime.now().isoformat(),
+            timestamp_ns=time.time_ns(),
             round_number=self.game_state.round_number
         )
         self.game_state.action_history.append(action)
@@ -702,14 +869,8 @@ Choose your target and provide a clear reason considering the defense."""
         separator = "=" * 50
         game_over_msg = "🏆 GAME OVER!"
         
-        print("\n" + separator)
-        print(game_over_msg)
-        print(separator)
-        
         # Log the game ending
-        self._observer_info(separator)
-        self._observer_info(game_over_msg)
-        self._observer_info(separator)
+        self._log(f"\n{separator}\n{game_over_msg}\n{separator}", separator, game_over_msg, separator)
         
         if self.game_state.winner == "mafia":
             winner_msg = "🔪 MAFIA WINS!"
@@ -721,28 +882,15 @@ Choose your target and provide a clear reason considering the defense."""
             winner_msg = "🤝 TIE GAME!"
             reason_msg = "The game has reached a stalemate - Doctor vs Mafia in final 2!"
         
-        print(winner_msg)
-        print(reason_msg)
-        self._observer_info(winner_msg)
-        self._observer_info(reason_msg)
-        
-        rounds_msg = f"\nGame lasted {self.game_state.round_number} rounds"
-        print(rounds_msg)
-        self._observer_info(rounds_msg.replace("\n", ""))
-        
-        final_status_msg = f"\nFinal Status:"
-        print(final_status_msg)
-        self._observer_info(final_status_msg.replace("\n", ""))
+        self._log(f"{winner_msg}\n{reason_msg}", winner_msg, reason_msg)
+        self._log(f"\nGame lasted {self.game_state.round_number} rounds")
+        self._log("\nFinal Status:")
         
         for player in self.game_state.players:
             status = "ALIVE" if player.is_alive else "ELIMINATED"
-            player_status = f"  {player.name} ({player.role.value}): {status}"
-            print(player_status)
-            self._observer_info(player_status)
+            self._log(f"  {player.name} ({player.role_name}): {status}")
         
-        elimination_msg = f"\nElimination order: {' → '.join(self.game_state.elimination_history)}"
-        print(elimination_msg)
-        self._observer_info(elimination_msg.replace("\n", ""))
+        self._log(f"\nElimination order: {' → '.join(self.game_state.elimination_history)}")
         
         # Create comprehensive end-game logging
         self._create_comprehensive_logs()
@@ -757,135 +905,114 @@ Choose your target and provide a clear reason considering the defense."""
         try:
             # Observer log is already in the directory
             
-            # Generate individual player state files
-            for player in self.game_state.players:
-                self._create_player_state_file(player, log_dir)
-            
-            # Create comprehensive game summary
-            self._create_game_summary_file(log_dir)
+            # Individual player state files, the comprehensive game summary and the event log.
+            # Each job renders and writes its own file, so they overlap on the pool.
+            jobs = [functools.partial(self._create_player_state_file, player, log_dir) for player in self.game_state.players]
+            jobs.append(functools.partial(self._create_game_summary_file, log_dir))
+            jobs.append(functools.partial(self._create_event_log_file, log_dir))
+            with ThreadPoolExecutor(max_workers=min(8, len(jobs)), thread_name_prefix="mafia-logs") as pool:
+                # Consuming the results re-raises the first failure here
+                list(pool.map(lambda job: job(), jobs))
             
-            print(f"📁 Comprehensive logs created in folder: {log_dir}")
-            self._observer_info(f"Comprehensive logs created in folder: {log_dir}")
+            self._log(f"📁 Comprehensive logs created in folder: {log_dir}", f"Comprehensive logs created in folder: {log_dir}")
             
         except Exception as e:
-            print(f"❌ Error creating comprehensive logs: {e}")
-            self._observer_info(f"Error creating comprehensive logs: {e}")
+            self._log(f"❌ Error creating comprehensive logs: {e}", f"Error creating comprehensive logs: {e}")
     
     def _create_player_state_file(self, player: Player, log_dir: str):
         """Create simple state file showing final context for this agent"""
         filename = f"{player.name.lower()}_final_context.txt"
         filepath = os.path.join(log_dir, filename)
         
-        # Create a mock agent to get the context they would have seen
-        agent = self._create_mock_agent(player)
+        # The player's own agent renders the context they would have seen
+        agent = self.agents[player.name]
         
         with open(filepath, 'w') as f:
             # Just write the raw final context, no extra formatting
             final_context = agent.get_base_context(self.game_state)
             f.write(final_context)
     
-    def _create_mock_agent(self, player: Player):
-        """Create a mock agent to generate context for this player"""
-        if player.role == Role.MAFIA:
-            from role_agents import MafiaAgent
-            return MafiaAgent(player.name, player.personality, self.llm)
-        elif player.role == Role.DOCTOR:
-            from role_agents import DoctorAgent
-            return DoctorAgent(player.name, player.personality, self.llm)
-        elif player.role == Role.DETECTIVE:
-            from role_agents import DetectiveAgent
-            return DetectiveAgent(player.name, player.personality, self.llm)
-        else:
-            from role_agents import VillagerAgent
-            return VillagerAgent(player.name, player.personality, self.llm)
-    
     def _create_game_summary_file(self, log_dir: str):
         """Create comprehensive game summary with statistics"""
         filepath = os.path.join(log_dir, "game_summary.txt")
         
-        with open(filepath, 'w') as f:
-            f.write("=== MAFIA GAME COMPREHENSIVE SUMMARY ===\n\n")
-            
-            f.write(f"Game Configuration:\n")
-            f.write(f"- Total Players: {len(self.game_state.players)}\n")
-            f.write(f"- Mafia Count: {self.num_mafia}\n")
-            f.write(f"- Max Discussion Rounds: {self.max_discussion_rounds}\n")
-            f.write(f"- Model Used: {self.llm.model_name}\n\n")
-            
-            f.write(f"Game Outcome:\n")
-            f.write(f"- Winner: {self.game_state.winner.upper()}\n")
-            f.write(f"- Total Rounds: {self.game_state.round_number}\n")
-            f.write(f"- Elimination Order: {' → '.join(self.game_state.elimination_history)}\n\n")
-            
-            f.write("Team Composition:\n")
-            mafia_team = [p.name for p in self.game_state.players if p.role == Role.MAFIA]
-            village_team = [p.name for p in self.game_state.players if p.role != Role.MAFIA]
-            
-            f.write(f"Mafia Team ({len(mafia_team)}): {', '.join(mafia_team)}\n")
-            f.write(f"Village Team ({len(village_team)}): {', '.join(village_team)}\n\n")
-            
-            f.write("Final Status:\n")
-            for player in self.game_state.players:
-                status = "ALIVE" if player.is_alive else "ELIMINATED"
-                f.write(f"- {player.name} ({player.role.value}): {status}\n")
-            
-            f.write("\n=== GAME ANALYSIS ===\n")
-            f.write("Key Factors in Outcome:\n")
-            
+        gs = self.game_state
+        mafia_team, village_team = self._split_by_team(p.name for p in gs.players)
+        eliminated_mafia, eliminated_village = self._split_by_team(gs.elimination_history)
+        # Position in the history + 1 is the round, since there is one elimination per round
+        elimination_rounds = {name: i + 1 for i, name in enumerate(gs.elimination_history)}
+        
+        lines = [
+            "=== MAFIA GAME COMPREHENSIVE SUMMARY ===",
+            "",
+            "Game Configuration:",
+            f"- Total Players: {len(gs.players)}",
+            f"- Mafia Count: {self.num_mafia}",
+            f"- Max Discussion Rounds: {self.max_discussion_rounds}",
+            f"- Model Used: {self.llm.model_name}",
+            "",
+            "Game Outcome:",
+            f"- Winner: {gs.winner.upper()}",
+            f"- Total Rounds: {gs.round_number}",
+            f"- Elimination Order: {' → '.join(gs.elimination_history)}",
+            "",
+            "Team Composition:",
+            f"Mafia Team ({len(mafia_team)}): {', '.join(mafia_team)}",
+            f"Village Team ({len(village_team)}): {', '.join(village_team)}",
+            "",
+            "Final Status:",
+        ]
+        lines.extend(f"- {player.name} ({player.role_name}): {'ALIVE' if player.is_alive else 'ELIMINATED'}"
+                     for player in gs.players)
+        
+        lines.extend([
+            "",
+            "=== GAME ANALYSIS ===",
+            "Key Factors in Outcome:",
             # Analyze eliminations
-            eliminated_mafia = [name for name in self.game_state.elimination_history 
-                              if any(p.name == name and p.role == Role.MAFIA for p in self.game_state.players)]
-            eliminated_village = [name for name in self.game_state.elimination_history 
-                                if any(p.name == name and p.role != Role.MAFIA for p in self.game_state.players)]
-            
-            f.write(f"- Mafia eliminated: {len(eliminated_mafia)} ({', '.join(eliminated_mafia) if eliminated_mafia else 'None'})\n")
-            f.write(f"- Village eliminated: {len(eliminated_village)} ({', '.join(eliminated_village) if eliminated_village else 'None'})\n")
-            
+            f"- Mafia eliminated: {len(eliminated_mafia)} ({', '.join(eliminated_mafia) if eliminated_mafia else 'None'})",
+            f"- Village eliminated: {len(eliminated_village)} ({', '.join(eliminated_village) if eliminated_village else 'None'})",
             # Special roles impact
-            detective_alive = any(p.is_alive and p.role == Role.DETECTIVE for p in self.game_state.players)
-            doctor_alive = any(p.is_alive and p.role == Role.DOCTOR for p in self.game_state.players)
-            
-            f.write(f"- Detective survived: {detective_alive}\n")
-            f.write(f"- Doctor survived: {doctor_alive}\n")
-            
-            if self.game_state.detective_results:
-                f.write(f"- Detective investigations: {len(self.game_state.detective_results)} successful\n")
-            
-            f.write("\n=== PERSONALITY IMPACT ===\n")
-            for player in self.game_state.players:
-                if not player.is_alive:
-                    elimination_round = self._get_elimination_round(player.name)
-                    f.write(f"- {player.name}: {player.personality[:50]}... (Eliminated round {elimination_round})\n")
-                else:
-                    f.write(f"- {player.name}: {player.personality[:50]}... (Survived)\n")
-    
-    def _get_elimination_round(self, player_name: str) -> int:
-        """Get the round when a player was eliminated"""
-        if player_name in self.game_state.elimination_history:
-            # Since we have 1 elimination per round, the position in history + 1 is the round
-            return self.game_state.elimination_history.index(player_name) + 1
-        return 0
-    
-    def _get_player_voting_history(self, player_name: str) -> Dict[int, str]:
-        """Get voting history for a specific player"""
-        # This is a simplified version - in a full implementation, 
-        # we would track voting history per round
-        # For now, we'll return empty dict as this would require 
-        # more extensive tracking during the game
-        return {}
+            f"- Detective survived: {gs.detective_alive}",
+            f"- Doctor survived: {gs.doctor_alive}",
+        ])
+        if gs.detective_results:
+            lines.append(f"- Detective investigations: {len(gs.detective_results)} successful")
+        
+        lines.extend(["", "=== PERSONALITY IMPACT ==="])
+        for player in gs.players:
+            if not player.is_alive:
+                lines.append(f"- {player.name}: {player.personality[:50]}... (Eliminated round {elimination_rounds.get(player.name, 0)})")
+            else:
+                lines.append(f"- {player.name}: {player.personality[:50]}... (Survived)")
+        
+        # Build the whole summary in memory and write it with one call
+        with open(filepath, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+    
+    def _create_event_log_file(self, log_dir: str):
+        """Write GameState.events as JSON Lines, one change per line in the order it happened"""
+        filepath = os.path.join(log_dir, "game_events.jsonl")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("".join(json.dumps(event, ensure_ascii=False) + "\n" for event in self.game_state.events))
+    
+    def _split_by_team(self, names: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Partition player names into (mafia, village) in one pass, keeping their order"""
+        players_by_name = self.game_state.players_by_name
+        mafia, village = [], []
+        for name in names:
+            (mafia if players_by_name[name].role == Role.MAFIA else village).append(name)
+        return mafia, village
     
     def _track_player_night_action(self, player_name: str, action_type: str, target: str, reason: str):
         """Track individual player's night action"""
-        if player_name not in self.game_state.player_night_actions:
-            self.game_state.player_night_actions[player_name] = []
-        
         action_record = {
             'round': self.game_state.round_number,
             'action_type': action_type,
             'target': target,
             'reason': reason
         }
-        self.game_state.player_night_actions[player_name].append(action_record)
+        self.game_state.record_night_action(player_name, action_type, action_record)
     
     def _log_agent_context(self, agent_name: str, context: str, phase_description: str):
         """Log the context being passed to an agent for debugging"""
@@ -897,12 +1024,36 @@ Choose your target and provide a clear reason considering the defense."""
             return
             
         # Only log for alive players
-        if agent_name not in self.game_state.alive_players:
+        if agent_name not in self.game_state.alive_set:
             return
             
         context_file = os.path.join(self.context_log_dir, f"{agent_name.lower()}_context.txt")
-        
-        with open(context_file, 'a') as f:
-            f.write(f"=== {phase_description} ===\n")
-            f.write(context)
-            f.write(f"\n{'-' * 50}\n\n")
\ No newline at end of file
+        self._context_log_queue.put((context_file, f"=== {phase_description} ===\n{context}\n{'-' * 50}\n\n"))
+    
+    def _drain_context_log(self):
+        """Background writer for _log_agent_context. A None item flushes, closes and stops it."""
+        handles = {}  # path -> open file
+        stopping = False
+        while not stopping:
+            # Take everything queued so far and give each file a single write
+            pending: Dict[str, List[str]] = {}  # path -> texts, in queue order
+            item = self._context_log_queue.get()
+            while item is not None:
+                path, text = item
+                pending.setdefault(path, []).append(text)
+                try:
+                    item = self._context_log_queue.get_nowait()
+                except queue.Empty:
+                    break
+            else:
+                stopping = True
+            
+            for path, texts in pending.items():
+                f = handles.get(path)
+                if f is None:
+                    f = handles[path] = open(path, 'a')
+                f.write("".join(texts))
+                # Flush once per batch so the files stay readable mid-game
+                f.flush()
+        for f in handles.values():
+            f.close()
\ No newline at end of file
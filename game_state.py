@@ -1,7 +1,25 @@
+import sys
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from datetime import datetime
+from collections import defaultdict
+from typing import List, Dict, Optional, Set, Tuple
 from enum import Enum
 
+# Fixed history section headers, interned once at import
+_H_DISCUSSION = sys.intern("DISCUSSION HISTORY:\n")
+_H_VOTING = sys.intern("VOTING HISTORY:\n")
+_NO_HISTORY = sys.intern("No game history yet.")
+
+# Game state + history section shared by every agent's context
+_SHARED_CONTEXT_TMPL = """CURRENT GAME STATE:
+- Phase: {phase}
+- Round: {round}
+- Players alive: {alive}
+- Players eliminated: {elim} (roles unknown)
+
+{history}
+""".format_map
+
 class Role(Enum):
     MAFIA = "mafia"
     DOCTOR = "doctor" 
@@ -16,31 +34,48 @@ class GamePhase(Enum):
     DAY_FINAL_VOTING = "day_final_voting"
     GAME_OVER = "game_over"
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     name: str
     personality: str
     role: Role
     is_alive: bool = True
     votes_received: int = 0
+    role_name: str = field(init=False, repr=False)  # role.value, looked up once
+    
+    def __post_init__(self):
+        self.role_name = self.role.value
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GameAction:
     player_name: str
     action_type: str
+    round_number: int
     target: Optional[str] = None
     message: Optional[str] = None
-    timestamp: str = ""
-    round_number: int = 1
+    timestamp_ns: int = 0  # time.time_ns() when the action happened
+    message_lower: str = field(init=False, repr=False, compare=False)  # message.lower(), for keyword scans
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'message_lower', self.message.lower() if self.message else "")
+    
+    @property
+    def timestamp_iso(self) -> str:
+        """ISO formatted timestamp, only built when something displays it"""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9).isoformat() if self.timestamp_ns else ""
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     players: List[Player] = field(default_factory=list)
+    players_by_name: Dict[str, Player] = field(default_factory=dict)  # name -> player, filled by add_player
     phase: GamePhase = GamePhase.NIGHT
     round_number: int = 1
     alive_players: List[str] = field(default_factory=list)
+    alive_set: Set[str] = field(default_factory=set)  # same names as alive_players, for membership tests
+    alive_village: List[str] = field(default_factory=list)  # alive non-Mafia names, in seating order
     dead_players: List[str] = field(default_factory=list)
     mafia_members: List[str] = field(default_factory=list)
+    mafia_team_str: str = ""  # ", ".join(mafia_members), fixed once roles are assigned
     
     # Night phase results
     mafia_target: Optional[str] = None
@@ -50,8 +85,11 @@ class GameState:
     
     # Day phase tracking
     discussion_messages: List[GameAction] = field(default_factory=list)
+    messages_by_round: Dict[int, List[GameAction]] = field(default_factory=lambda: defaultdict(list))  # round -> messages
     votes: Dict[str, str] = field(default_factory=dict)  # voter -> target
     vote_counts: Dict[str, int] = field(default_factory=dict)  # target -> count
+    top_votes: int = 0  # highest count in vote_counts
+    top_voted: List[str] = field(default_factory=list)  # targets on top_votes, in the order they reached it
     suspects_on_trial: List[str] = field(default_factory=list)
     
     # Game history
@@ -59,28 +97,248 @@ class GameState:
     elimination_history: List[str] = field(default_factory=list)
     
     # Individual player action tracking
-    player_night_actions: Dict[str, List[Dict]] = field(default_factory=dict)  # player_name -> [actions by round]
+    player_night_actions: Dict[str, Dict[str, List[Dict]]] = field(default_factory=dict)  # player_name -> action_type -> [actions by round]
     
     # Voting history tracking
     voting_history: List[Dict] = field(default_factory=list)  # [round_info with votes, trials, defenses]
     
     winner: Optional[str] = None  # "mafia" or "village"
+    
+    # Alive team counts, kept up to date by add_player / eliminate_player for the win check
+    mafia_alive: int = 0
+    village_alive: int = 0
+    doctor_alive: bool = False
+    detective_alive: bool = False
+    
+    # Bumped by every mutator below, so callers can tell when agent contexts are stale
+    version: int = 0
+    # Append-only log of what each mutator changed, one dict per change; replaying it rebuilds the game
+    events: List[Dict] = field(default_factory=list)
+    
+    # Joined player lists for prompts, refreshed whenever the lists change
+    alive_players_str: str = ""
+    elimination_history_str: str = ""
+    
+    # Rendered history / shared context memos: (cache key, rendered string)
+    _history_cache: Optional[Tuple[tuple, str]] = field(default=None, init=False, repr=False, compare=False)
+    _shared_context_cache: Optional[Tuple[tuple, str]] = field(default=None, init=False, repr=False, compare=False)
+    _rendered_discussion_rounds: Dict[int, Tuple[int, str]] = field(default_factory=dict, init=False, repr=False, compare=False)  # round -> (messages rendered, text)
+    _rendered_voting_rounds: List[str] = field(default_factory=list, init=False, repr=False, compare=False)  # parallel to voting_history
+    _alive_player_objs: Optional[List[Player]] = field(default=None, init=False, repr=False, compare=False)  # get_alive_players(), None when stale
 
+    def add_player(self, player: Player):
+        """Add a player at game setup; new players start alive"""
+        self.players.append(player)
+        self.players_by_name[player.name] = player
+        self.alive_players.append(player.name)
+        self.alive_set.add(player.name)
+        if player.role != Role.MAFIA:
+            self.alive_village.append(player.name)
+        self._alive_player_objs = None
+        self._count_alive(player, 1)
+        self._refresh_player_strings()
+        self._record_event("join", player=player.name, role=player.role_name)
+    
+    def eliminate_player(self, name: str) -> Optional[Player]:
+        """Mark a player as eliminated. Returns the player, or None if unknown."""
+        player = self.get_player_by_name(name)
+        if player:
+            player.is_alive = False
+            self.alive_players.remove(name)
+            self.alive_set.discard(name)
+            if player.role != Role.MAFIA:
+                self.alive_village.remove(name)
+            self._alive_player_objs = None
+            self._count_alive(player, -1)
+            self.dead_players.append(name)
+            self.elimination_history.append(name)
+            self._refresh_player_strings()
+            self._record_event("eliminate", player=name)
+        return player
+    
+    def _count_alive(self, player: Player, delta: int):
+        """Apply a player joining (+1) or leaving (-1) the living to the team counts"""
+        if player.role == Role.MAFIA:
+            self.mafia_alive += delta
+        else:
+            self.village_alive += delta
+            if player.role == Role.DOCTOR:
+                self.doctor_alive = delta > 0
+            elif player.role == Role.DETECTIVE:
+                self.detective_alive = delta > 0
+    
+    def _refresh_player_strings(self):
+        self.alive_players_str = ", ".join(self.alive_players)
+        self.elimination_history_str = ", ".join(self.elimination_history)
+    
+    def add_discussion_message(self, message: GameAction):
+        """Record a discussion message, keeping the per-round grouping up to date"""
+        self.discussion_messages.append(message)
+        self.messages_by_round[message.round_number].append(message)
+        self._record_event("message", player=message.player_name, message=message.message)
+    
+    def add_voting_round(self, round_info: Dict):
+        """Record a finished voting round; entries are not edited afterwards"""
+        self.voting_history.append(round_info)
+        # Individual votes are already logged as they were cast
+        self._record_event("voting_round", **{k: v for k, v in round_info.items() if k not in ('votes', 'final_votes')})
+    
+    def record_vote(self, voter: str, target: str):
+        """Record a vote, keeping the leading target(s) up to date as the tally grows"""
+        self.votes[voter] = target
+        count = self.vote_counts.get(target, 0) + 1
+        self.vote_counts[target] = count
+        if count > self.top_votes:
+            self.top_votes = count
+            self.top_voted = [target]
+        elif count == self.top_votes:
+            self.top_voted.append(target)
+        self._record_event("vote", voter=voter, target=target)
+    
+    def record_night_action(self, player_name: str, action_type: str, action_record: Dict):
+        player_actions = self.player_night_actions.setdefault(player_name, {})
+        player_actions.setdefault(action_type, []).append(action_record)
+        self._record_event("night_action", player=player_name, action=action_type,
+                           target=action_record.get('target'), reason=action_record.get('reason'))
+    
+    def record_detective_result(self, target: str, role: str):
+        self.detective_results[target] = role
+        self._record_event("detective_result", target=target, role=role)
+    
+    def _record_event(self, op: str, **data):
+        """Append a change to the event log and bump the version"""
+        self.events.append({"round": self.round_number, "phase": self.phase.value, "op": op, **data})
+        self.version += 1
+    
+    def _history_key(self) -> tuple:
+        return (len(self.discussion_messages), len(self.voting_history), self.round_number,
+                id(self.voting_history[-1]) if self.voting_history else 0)
+    
+    def render_history(self) -> str:
+        """Return the game history text, re-rendering only when it has changed"""
+        key = self._history_key()
+        if self._history_cache is None or self._history_cache[0] != key:
+            self._history_cache = (key, self._render_history())
+        return self._history_cache[1]
+    
+    def build_shared_context_block(self, include_history: bool = True) -> str:
+        """Public part of every agent's context: phase, round, players and history.
+        
+        Identical for all agents at a given point in the game, so it is rendered
+        once and reused until the state changes.
+        """
+        key = (self.phase, self.round_number, len(self.elimination_history), include_history,
+               self._history_key() if include_history else None)
+        if self._shared_context_cache is None or self._shared_context_cache[0] != key:
+            block = _SHARED_CONTEXT_TMPL({
+                'phase': self.phase.value,
+                'round': self.round_number,
+                'alive': self.alive_players_str,
+                'elim': self.elimination_history_str,
+                'history': self.render_history() if include_history else "",
+            })
+            self._shared_context_cache = (key, block)
+        return self._shared_context_cache[1]
+    
+    def _render_history(self) -> str:
+        """Render discussion and voting history shared by all agents.
+        
+        History only ever grows, so finished pieces are rendered once and kept;
+        each call only formats what was added since the last one.
+        """
+        parts: List[str] = []
+        
+        # Discussion history grouped by round
+        if self.discussion_messages:
+            parts.append(_H_DISCUSSION)
+            
+            # Display messages grouped by round
+            multiple_rounds = len(self.messages_by_round) > 1
+            for round_num, round_messages in sorted(self.messages_by_round.items()):
+                if multiple_rounds:
+                    parts.append(f"\n=== Day {round_num} Discussion ===\n")
+                parts.append(self._render_discussion_round(round_num, round_messages))
+            parts.append("\n")
+        
+        # Voting history with reasons (entries are appended complete and never edited)
+        if self.voting_history:
+            parts.append(_H_VOTING)
+            rendered = self._rendered_voting_rounds
+            for round_info in self.voting_history[len(rendered):]:
+                rendered.append(self._render_voting_round(round_info))
+            parts.extend(rendered)
+        
+        return "".join(parts) if parts else _NO_HISTORY
+    
+    def _render_discussion_round(self, round_num: int, round_messages: List[GameAction]) -> str:
+        count, text = self._rendered_discussion_rounds.get(round_num, (0, ""))
+        if count != len(round_messages):
+            text += "".join(f"- {msg.player_name}: {msg.message}\n" for msg in round_messages[count:])
+            self._rendered_discussion_rounds[round_num] = (len(round_messages), text)
+        return text
+    
+    def _render_voting_round(self, round_info: Dict) -> str:
+        parts: List[str] = []
+        
+        # Show the day and voting round if available
+        voting_round_num = round_info.get('voting_round', 1)
+        if voting_round_num > 1:
+            parts.append(f"=== Day {round_info['round']} Voting (Round {voting_round_num}) ===\n")
+        else:
+            parts.append(f"=== Day {round_info['round']} Voting ===\n")
+        
+        # Show initial votes
+        if round_info['votes']:
+            parts.append(f"Initial votes:\n{self._format_vote_lines(round_info['votes'])}\n")
+        
+        # Show trial information
+        if 'trial_candidate' in round_info:
+            parts.append(f"Trial: {round_info['trial_candidate']} (most votes)\n")
+        elif 'tied_candidates' in round_info:
+            parts.append(f"Tie between: {', '.join(round_info['tied_candidates'])} ({round_info['tie_votes']} votes each)\n")
+        
+        # Show defense
+        if 'defense' in round_info:
+            parts.append(f"Defense by {round_info['trial_candidate']}: {round_info['defense']}\n")
+        
+        # Show final votes after defense
+        if 'final_votes' in round_info and round_info['final_votes']:
+            parts.append(f"Final votes after defense:\n{self._format_vote_lines(round_info['final_votes'])}\n")
+        
+        # Show elimination result
+        if 'eliminated' in round_info:
+            eliminated_player = round_info['eliminated']
+            if eliminated_player == True:
+                eliminated_player = "Unknown player"
+            elif eliminated_player == False:
+                eliminated_player = "No one"
+            parts.append(f"Eliminated: {eliminated_player}\n")
+        
+        parts.append("\n")
+        return "".join(parts)
+    
+    @staticmethod
+    def _format_vote_lines(votes: List[Dict]) -> str:
+        return "\n".join(f"- {v['voter']} votes for {v['target']}: {v['reason']}" for v in votes)
+    
     def get_alive_players(self) -> List[Player]:
-        return [p for p in self.players if p.is_alive]
+        """Alive players in seating order. The list is shared until someone joins or dies, so don't modify it."""
+        if self._alive_player_objs is None:
+            self._alive_player_objs = [self.players_by_name[name] for name in self.alive_players]
+        return self._alive_player_objs
     
     def get_player_by_name(self, name: str) -> Optional[Player]:
-        return next((p for p in self.players if p.name == name), None)
+        return self.players_by_name.get(name)
     
     def get_mafia_players(self) -> List[Player]:
-        return [p for p in self.players if p.role == Role.MAFIA and p.is_alive]
+        return [p for p in self.get_alive_players() if p.role == Role.MAFIA]
     
     def get_village_players(self) -> List[Player]:
-        return [p for p in self.players if p.role != Role.MAFIA and p.is_alive]
+        return [p for p in self.get_alive_players() if p.role != Role.MAFIA]
     
     def check_win_condition(self) -> Optional[str]:
-        mafia_alive = len(self.get_mafia_players())
-        village_alive = len(self.get_village_players())
+        mafia_alive = self.mafia_alive
+        village_alive = self.village_alive
         total_alive = mafia_alive + village_alive
         
         if mafia_alive == 0:
@@ -91,18 +349,13 @@ class GameState:
             # Equal numbers - check special cases
             if total_alive == 2:
                 # 1 mafia + 1 villager
-                village_players = self.get_village_players()
-                if len(village_players) == 1:
-                    remaining_villager = village_players[0]
-                    if remaining_villager.role == Role.DOCTOR:
-                        return "tie"  # Doctor can potentially save themselves indefinitely
-                    else:
-                        return "mafia"  # Non-doctor villager can't win in 1v1
+                if self.doctor_alive:
+                    return "tie"  # Doctor can potentially save themselves indefinitely
+                else:
+                    return "mafia"  # Non-doctor villager can't win in 1v1
             elif total_alive == 4 and mafia_alive == 2:
                 # 2 mafia + 2 villagers - check if doctor is among villagers
-                village_players = self.get_village_players()
-                has_doctor = any(p.role == Role.DOCTOR for p in village_players)
-                if not has_doctor:
+                if not self.doctor_alive:
                     return "mafia"  # No doctor = mafia can kill at night and win
                 # If there is a doctor, game continues (doctor might save someone)
         return None
@@ -110,5 +363,8 @@ class GameState:
     def reset_votes(self):
         self.votes.clear()
         self.vote_counts.clear()
+        self.top_votes = 0
+        self.top_voted = []
         for player in self.players:
-            player.votes_received = 0
\ No newline at end of file
+            player.votes_received = 0
+        self.version += 1
\ No newline at end of file
@@ -1,14 +1,123 @@
-from openai import OpenAI
-from typing import Dict, Any, Optional, TypeVar, Type
+from openai import OpenAI, AsyncOpenAI, BadRequestError
+import httpx
+from typing import Dict, Any, List, Optional, Sequence, Tuple, TypeVar, Type, Union, get_args, get_origin
+import asyncio
+import contextlib
+import functools
+import hashlib
+import importlib.util
 import json
 import os
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import fields
 
+try:
+    # Optional C extension, several times faster on long replies; its errors subclass json.JSONDecodeError
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 T = TypeVar('T')
 
+# Keep connections open between calls and allow a whole phase's requests in flight at once
+_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+# HTTP/2 multiplexes concurrent requests over one connection, but httpx needs the h2 package for it
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_JSON_OBJECT_FORMAT = {'type': 'json_object'}
+
+# Reply budget when a call doesn't set max_tokens
+_DEFAULT_MAX_TOKENS = 1000
+
+# Model families whose OpenAI-compatible endpoints accept response_format=json_schema
+_STRUCTURED_OUTPUT_MODELS = ("gpt-", "gemini-")
+
+_SCHEMA_TYPES = {str: "string", bool: "boolean", int: "integer", float: "number"}
+
+# Words in a 400 that mark it as a rejection of response_format rather than of the prompt (length, content policy)
+_RESPONSE_FORMAT_ERROR_WORDS = ("response_format", "json_schema", "json_object")
+
+def _error_mentions(error: BadRequestError, words: Sequence[str]) -> bool:
+    """Whether a 400's param, message or body names any of words"""
+    text = f"{getattr(error, 'param', None) or ''} {error} {getattr(error, 'body', '') or ''}".lower()
+    return any(word in text for word in words)
+
+def _schema_type(field_type) -> Dict[str, Any]:
+    if get_origin(field_type) is Union and type(None) in get_args(field_type):
+        inner = next(t for t in get_args(field_type) if t is not type(None))
+        return {"type": [_SCHEMA_TYPES.get(inner, "string"), "null"]}
+    return {"type": _SCHEMA_TYPES.get(field_type, "string")}
+
+@functools.lru_cache(maxsize=32)
+def _json_schema_format(response_class: type) -> Dict[str, Any]:
+    """response_format asking for response_class as strict JSON, built once per class"""
+    class_fields = fields(response_class)
+    return {
+        'type': 'json_schema',
+        'json_schema': {
+            'name': response_class.__name__,
+            'strict': True,
+            'schema': {
+                'type': 'object',
+                'properties': {f.name: _schema_type(f.type) for f in class_fields},
+                'required': [f.name for f in class_fields],
+                'additionalProperties': False,
+            },
+        },
+    }
+
+@functools.lru_cache(maxsize=32)
+def _field_pattern(response_class: type) -> "re.Pattern":
+    """One regex matching any "- field: value" entry of response_class, so a reply is scanned once.
+    
+    A value runs up to the next field line, so it may span several lines or be empty. Field lines may be
+    indented or sit behind markdown quote/bullet markers, as the LLM sometimes writes them.
+    """
+    names = "|".join(re.escape(f.name) for f in fields(response_class))
+    line_start = r"^[ \t>*]*-[ \t]*"  # allows indented, quoted or bulleted entries
+    return re.compile(rf"{line_start}({names}):[ \t]*(.*?)(?={line_start}(?:{names}):|\Z)", re.M | re.S)
+
+@functools.lru_cache(maxsize=32)
+def _json_scalar_pattern(response_class: type) -> "re.Pattern":
+    """One regex matching a completed non-string "field": value pair of response_class, for reading partial JSON"""
+    names = "|".join(re.escape(f.name) for f in fields(response_class) if f.type is not str)
+    return re.compile(rf'"({names})"\s*:\s*(true|false|null|-?\d+(?:\.\d+)?)\s*[,}}]')
+
+@functools.lru_cache(maxsize=32)
+def _structured_suffix(response_class: type) -> str:
+    """Format instructions appended to a structured prompt, built once per response class"""
+    field_descriptions = []
+    
+    for field in fields(response_class):
+        field_type = field.type
+        if hasattr(field_type, '__origin__') and field_type.__origin__ is Optional:
+            field_type = field_type.__args__[0]
+        
+        type_hint = ""
+        if field_type == str:
+            type_hint = " (string)"
+        elif field_type == bool:
+            type_hint = " (true/false)"
+        elif field_type == int:
+            type_hint = " (number)"
+            
+        field_descriptions.append(f"- {field.name}{type_hint}")
+    
+    return f"""
+
+IMPORTANT: Respond ONLY with the following format (no extra text, no markdown, no explanations):
+{chr(10).join(field_descriptions)}
+
+Example format:
+{chr(10).join(f"- {field.name}: [your response here]" for field in fields(response_class))}"""
+
 class LLMInterface:
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "gpt-5-nano", base_url: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "gpt-5-nano", base_url: Optional[str] = None,
+                 json_mode: bool = True, structured_outputs: Optional[bool] = None, max_concurrency: Optional[int] = None):
         self.api_key = api_key or os.getenv("YOUR_API_KEY")
         if not self.api_key:
             raise ValueError("YOUR_API_KEY not provided. Set YOUR_API_KEY environment variable or pass api_key parameter.")
@@ -19,82 +128,360 @@ class LLMInterface:
         
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url=self.base_url
+            base_url=self.base_url,
+            http_client=httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=_HTTP2)
+        )
+        # Async client for the game loop, which fans out many calls at once
+        self.async_client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=_HTTP2)
         )
         self.model_name = model_name
+        # Ask for response_format=json_object on JSON prompts; switched off if the endpoint rejects it
+        self.json_mode = json_mode
+        # Ask for structured responses as schema-constrained JSON (default: by model family); the
+        # "- field: value" text format is the fallback, and is used for good if the endpoint rejects it
+        if structured_outputs is None:
+            structured_outputs = model_name.startswith(_STRUCTURED_OUTPUT_MODELS)
+        self.structured_outputs = structured_outputs
+        # Stream structured requests that set abort_on; switched off if the endpoint rejects a streamed request
+        self.stream_structured = True
+        
+        # Exact-match LRU response cache, off unless enable_response_cache() is called
+        self._response_cache: Optional[OrderedDict] = None
+        self._response_cache_size = 0
+        self._response_cache_path: Optional[str] = None
+        self._response_cache_lock = threading.Lock()
+        
+        # Cap on async requests in flight at once (e.g. to stay under a provider's rate limit); None for no cap
+        self.max_concurrency = max_concurrency
+        self._request_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+    
+    def close(self):
+        """Release the sync client's pooled connections"""
+        self.client.close()
+    
+    async def aclose(self):
+        """Release the async client's pooled connections. Await it on the loop that made the calls."""
+        await self.async_client.close()
+    
+    def enable_response_cache(self, path: str, maxsize: int = 4096):
+        """Reuse responses for prompts seen before. Entries are loaded from and saved to path.
+        
+        Keeps the maxsize most recently used responses.
+        """
+        cache = OrderedDict()
+        if os.path.exists(path):
+            with open(path) as f:
+                cache.update(_json_loads(f.read()))
+        while len(cache) > maxsize:
+            cache.popitem(last=False)
+        self._response_cache = cache
+        self._response_cache_size = maxsize
+        self._response_cache_path = path
     
-    def generate_response(self, prompt: str, temperature: float = 0.7) -> str:
+    @property
+    def response_cache_enabled(self) -> bool:
+        return self._response_cache is not None
+    
+    def save_response_cache(self):
+        if self._response_cache is None or not self._response_cache_path:
+            return
+        with self._response_cache_lock:
+            with open(self._response_cache_path, 'w') as f:
+                json.dump(self._response_cache, f)
+    
+    def _cache_key(self, prompt: str, prefix: Optional[str], temperature: float,
+                   response_format: Optional[Dict[str, Any]], max_tokens: Optional[int]) -> str:
+        # Replies depend on the response format and budget too: a schema reply isn't a text-format one,
+        # and a reply cut off at a small max_tokens mustn't answer a call that allows more
+        format_key = json.dumps(response_format, sort_keys=True) if response_format else ''
+        key = (f"{self.model_name}\0{self._effective_temperature(temperature)}\0{self._effective_max_tokens(max_tokens)}\0"
+               f"{format_key}\0{prefix or ''}\0{prompt}")
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    
+    def _lookup_cached(self, prompt: str, prefix: Optional[str], temperature: float, response_format: Optional[Dict[str, Any]],
+                       max_tokens: Optional[int]) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (cache key, cached response). Both are None while caching is off."""
+        if self._response_cache is None:
+            return None, None
+        cache_key = self._cache_key(prompt, prefix, temperature, response_format, max_tokens)
+        with self._response_cache_lock:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+        return cache_key, cached
+    
+    def _request_slot(self):
+        """Async context manager held around each async request; a semaphore per event loop when capped"""
+        if self.max_concurrency is None:
+            return contextlib.nullcontext()
+        loop = asyncio.get_running_loop()
+        if self._request_slots is None or self._request_slots[0] is not loop:
+            self._request_slots = (loop, asyncio.Semaphore(self.max_concurrency))
+        return self._request_slots[1]
+    
+    def _effective_temperature(self, temperature: float) -> float:
+        # gpt-5-nano only supports temperature=1
+        return 1.0 if self.model_name.startswith("gpt-5") else temperature
+    
+    def _effective_max_tokens(self, max_tokens: Optional[int]) -> int:
+        # gpt-5 models spend part of the budget on hidden reasoning, so a tight cap would cut off the reply
+        if max_tokens is None or self.model_name.startswith("gpt-5"):
+            return _DEFAULT_MAX_TOKENS
+        return max_tokens
+    
+    def _chat_request(self, prompt: str, temperature: float, prefix: Optional[str],
+                      response_format: Optional[Dict[str, Any]] = None, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Arguments for chat.completions.create, shared by the sync and async paths.
+        
+        max_tokens bounds the reply. Calls of one kind share a budget, so a batch of them
+        finishes together instead of waiting on one long decode.
+        """
+        actual_temperature = self._effective_temperature(temperature)
+        
+        messages = [{'role': 'user', 'content': prompt}]
+        if prefix:
+            messages.insert(0, {'role': 'system', 'content': prefix})
+        
+        request = dict(
+            model=self.model_name,
+            messages=messages,
+            max_tokens=self._effective_max_tokens(max_tokens),
+            temperature=actual_temperature
+        )
+        if response_format:
+            request['response_format'] = response_format
+        return request
+    
+    def _finish_response(self, response, cache_key: Optional[str]) -> str:
+        text = response.choices[0].message.content.strip()
+        self._store_cached(cache_key, text)
+        return text
+    
+    def _store_cached(self, cache_key: Optional[str], text: str):
+        if cache_key:
+            with self._response_cache_lock:
+                self._response_cache[cache_key] = text
+                if len(self._response_cache) > self._response_cache_size:
+                    self._response_cache.popitem(last=False)
+    
+    def generate_response(self, prompt: str, temperature: float = 0.7, prefix: Optional[str] = None,
+                          response_format: Optional[Dict[str, Any]] = None, max_tokens: Optional[int] = None) -> str:
+        """prefix, if given, is sent as its own system message ahead of the prompt.
+        
+        Keep it byte-identical across calls so the provider can reuse its prompt cache.
+        """
+        cache_key, cached = self._lookup_cached(prompt, prefix, temperature, response_format, max_tokens)
+        if cached is not None:
+            return cached
+        
         try:
-            # gpt-5-nano only supports temperature=1
-            actual_temperature = 1.0 if self.model_name.startswith("gpt-5") else temperature
-            
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[{'role': 'user', 'content': prompt}],
-                max_tokens=1000,
-                temperature=actual_temperature
-            )
-            return response.choices[0].message.content.strip()
+            try:
+                response = self.client.chat.completions.create(**self._chat_request(prompt, temperature, prefix, response_format, max_tokens))
+            except BadRequestError as e:
+                if not self._drop_response_format(response_format, e):
+                    raise
+                response = self.client.chat.completions.create(**self._chat_request(prompt, temperature, prefix, max_tokens=max_tokens))
+            return self._finish_response(response, cache_key)
         except Exception as e:
             print(f"Error generating response: {e}")
             return "ERROR: Could not generate response"
     
-    def generate_json_response(self, prompt: str, temperature: float = 0.7) -> Dict[Any, Any]:
-        response_text = self.generate_response(prompt, temperature)
+    async def agenerate_response(self, prompt: str, temperature: float = 0.7, prefix: Optional[str] = None,
+                                 response_format: Optional[Dict[str, Any]] = None, use_cache: bool = True,
+                                 max_tokens: Optional[int] = None) -> str:
+        """Async version of generate_response. use_cache=False skips the response cache both ways."""
+        cache_key, cached = (self._lookup_cached(prompt, prefix, temperature, response_format, max_tokens)
+                             if use_cache else (None, None))
+        if cached is not None:
+            return cached
+        
+        try:
+            async with self._request_slot():
+                try:
+                    response = await self.async_client.chat.completions.create(**self._chat_request(prompt, temperature, prefix, response_format, max_tokens))
+                except BadRequestError as e:
+                    if not self._drop_response_format(response_format, e):
+                        raise
+                    response = await self.async_client.chat.completions.create(**self._chat_request(prompt, temperature, prefix, max_tokens=max_tokens))
+            return self._finish_response(response, cache_key)
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            return "ERROR: Could not generate response"
+    
+    def _drop_response_format(self, response_format: Optional[Dict[str, Any]], error: BadRequestError) -> bool:
+        """After a 400: stop sending that response_format if the error is about it. Returns True if a plain retry is worth it.
+        
+        Other 400s (prompt too long, content policy) and other failures leave the settings alone.
+        """
+        if not response_format or not _error_mentions(error, _RESPONSE_FORMAT_ERROR_WORDS):
+            return False
+        # Not every OpenAI-compatible endpoint accepts response_format
+        if response_format['type'] == 'json_schema':
+            # The prompt relied on the schema for its format, so the caller re-asks with the text format
+            self.structured_outputs = False
+            return False
+        self.json_mode = False
+        return True
+    
+    def _json_object_format(self) -> Optional[Dict[str, Any]]:
+        return _JSON_OBJECT_FORMAT if self.json_mode else None
+    
+    def generate_json_response(self, prompt: str, temperature: float = 0.7, prefix: Optional[str] = None) -> Dict[Any, Any]:
+        return self._parse_json_response(self.generate_response(prompt, temperature, prefix=prefix, response_format=self._json_object_format()))
+    
+    async def agenerate_json_response(self, prompt: str, temperature: float = 0.7, prefix: Optional[str] = None) -> Dict[Any, Any]:
+        return self._parse_json_response(await self.agenerate_response(prompt, temperature, prefix=prefix, response_format=self._json_object_format()))
+    
+    def _parse_json_response(self, response_text: str) -> Dict[Any, Any]:
         try:
             # Try to extract JSON from response
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                json_text = response_text[json_start:json_end].strip()
-            else:
-                json_text = response_text
+            _, fence, fenced = response_text.partition("```json")
+            json_text = fenced.partition("```")[0].strip() if fence else response_text
             
-            return json.loads(json_text)
+            return _json_loads(json_text)
         except json.JSONDecodeError:
             print(f"Failed to parse JSON response: {response_text}")
             return {"error": "Invalid JSON response", "raw_response": response_text}
     
-    def generate_structured_response(self, prompt: str, response_class: Type[T], temperature: float = 0.7) -> T:
+    def generate_structured_response(self, prompt: str, response_class: Type[T], temperature: float = 0.7,
+                                     prefix: Optional[str] = None, max_tokens: Optional[int] = None) -> T:
         """Generate a structured response using the specified dataclass"""
-        field_names = [f.name for f in fields(response_class)]
-        field_descriptions = []
+        if self.structured_outputs:
+            result = self._parse_json_structured(
+                self.generate_response(prompt, temperature, prefix=prefix, response_format=_json_schema_format(response_class),
+                                       max_tokens=max_tokens),
+                response_class)
+            if result is not None:
+                return result
+        response_text = self.generate_response(self._build_structured_prompt(prompt, response_class), temperature, prefix=prefix,
+                                               max_tokens=max_tokens)
+        return self._parse_structured_response(response_text, response_class)
+    
+    async def agenerate_structured_response(self, prompt: str, response_class: Type[T], temperature: float = 0.7,
+                                            prefix: Optional[str] = None, use_cache: bool = True,
+                                            max_tokens: Optional[int] = None, abort_on: Optional[Dict[str, Any]] = None) -> T:
+        """Async version of generate_structured_response.
         
-        for field in fields(response_class):
-            field_type = field.type
-            if hasattr(field_type, '__origin__') and field_type.__origin__ is Optional:
-                field_type = field_type.__args__[0]
-            
-            type_hint = ""
-            if field_type == str:
-                type_hint = " (string)"
-            elif field_type == bool:
-                type_hint = " (true/false)"
-            elif field_type == int:
-                type_hint = " (number)"
-                
-            field_descriptions.append(f"- {field.name}{type_hint}")
-        
-        structured_prompt = f"""{prompt}
-
-IMPORTANT: Respond ONLY with the following format (no extra text, no markdown, no explanations):
-{chr(10).join(field_descriptions)}
+        abort_on maps non-string fields to values, e.g. {'speak': False}. A schema-constrained reply is then
+        streamed and cut off once all non-string fields are in and match it; the string fields come back empty.
+        """
+        if self.structured_outputs:
+            if abort_on and self.stream_structured:
+                result = await self._astream_structured(prompt, response_class, temperature, prefix, abort_on, use_cache, max_tokens)
+            else:
+                result = self._parse_json_structured(
+                    await self.agenerate_response(prompt, temperature, prefix=prefix, response_format=_json_schema_format(response_class),
+                                                  use_cache=use_cache, max_tokens=max_tokens),
+                    response_class)
+            if result is not None:
+                return result
+        response_text = await self.agenerate_response(self._build_structured_prompt(prompt, response_class), temperature, prefix=prefix,
+                                                      use_cache=use_cache, max_tokens=max_tokens)
+        return self._parse_structured_response(response_text, response_class)
+    
+    async def _astream_structured(self, prompt: str, response_class: Type[T], temperature: float, prefix: Optional[str],
+                                  abort_on: Dict[str, Any], use_cache: bool, max_tokens: Optional[int]) -> Optional[T]:
+        """Streamed schema-constrained request behind abort_on. None if the reply isn't valid JSON.
+        
+        If streaming fails, the same request is sent again without streaming.
+        """
+        response_format = _json_schema_format(response_class)
+        cache_key, cached = (self._lookup_cached(prompt, prefix, temperature, response_format, max_tokens)
+                             if use_cache else (None, None))
+        if cached is not None:
+            return self._parse_json_structured(cached, response_class)
 
-Example format:
-{chr(10).join(f"- {field.name}: [your response here]" for field in fields(response_class))}"""
+        pattern = _json_scalar_pattern(response_class)
+        scalar_count = sum(1 for f in fields(response_class) if f.type is not str)
+        parts: List[str] = []
+        scalars: Dict[str, Any] = {}
+        try:
+            async with self._request_slot():
+                stream = await self.async_client.chat.completions.create(
+                    stream=True, **self._chat_request(prompt, temperature, prefix, response_format, max_tokens))
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices or not chunk.choices[0].delta.content:
+                            continue
+                        parts.append(chunk.choices[0].delta.content)
+                        scalars = {m.group(1): _json_loads(m.group(2)) for m in pattern.finditer("".join(parts))}
+                        if len(scalars) == scalar_count and all(scalars.get(name) == value for name, value in abort_on.items()):
+                            break
+                    else:
+                        scalars = {}  # ran to the end: the whole reply is parsed below
+                finally:
+                    # Closing the stream early drops the connection, so the server stops decoding the rest.
+                    # The reply read so far is all that's needed, so a failed close doesn't matter.
+                    with contextlib.suppress(Exception):
+                        await stream.close()
+        except Exception as e:
+            if isinstance(e, BadRequestError) and _error_mentions(e, ("stream",) + _RESPONSE_FORMAT_ERROR_WORDS):
+                # The endpoint may not stream with response_format; if it rejects the schema itself,
+                # the plain request below finds out and switches structured outputs off
+                self.stream_structured = False
+            print(f"Error streaming response, retrying without streaming: {e}")
+            return self._parse_json_structured(
+                await self.agenerate_response(prompt, temperature, prefix=prefix, response_format=response_format,
+                                              use_cache=use_cache, max_tokens=max_tokens),
+                response_class)
+        
+        if scalars:
+            # Cut off: the string fields were never decoded
+            data = {f.name: scalars.get(f.name, "") for f in fields(response_class)}
+            self._store_cached(cache_key, json.dumps(data))
+            return response_class(**data)
+        text = "".join(parts).strip()
+        self._store_cached(cache_key, text)
+        return self._parse_json_structured(text, response_class)
+    
+    async def asample_structured_response(self, prompt: str, response_class: Type[T], k: int, temperature: float = 0.8,
+                                          prefix: Optional[str] = None, max_tokens: Optional[int] = None) -> List[T]:
+        """k independent samples of the same request, sent concurrently.
+        
+        Samples bypass the response cache, which would otherwise hand back one reply k times.
+        """
+        return await asyncio.gather(*(self.agenerate_structured_response(prompt, response_class, temperature, prefix=prefix,
+                                                                       use_cache=False, max_tokens=max_tokens)
+                                      for _ in range(k)))
+    
+    async def abatch_structured_response(self, requests: Sequence[Tuple[str, Type[T], Optional[str]]],
+                                         temperature: float = 0.7, max_tokens: Optional[int] = None,
+                                         abort_on: Optional[Dict[str, Any]] = None) -> List[T]:
+        """Run several (prompt, response_class, prefix) requests as one batch. Results keep request order.
         
-        response_text = self.generate_response(structured_prompt, temperature)
+        The chat completions endpoint takes one conversation per request, so the batch goes out as
+        concurrent requests; servers with continuous batching (e.g. vLLM) schedule them together.
+        Batch requests of one kind, under one max_tokens, so none of them waits on a longer reply.
+        abort_on is passed on to agenerate_structured_response.
+        """
+        return await asyncio.gather(*(self.agenerate_structured_response(prompt, response_class, temperature, prefix=prefix,
+                                                                       max_tokens=max_tokens, abort_on=abort_on)
+                                      for prompt, response_class, prefix in requests))
+    
+    def _parse_json_structured(self, response_text: str, response_class: Type[T]) -> Optional[T]:
+        """Build response_class from a schema-constrained JSON reply, or None if the reply isn't one"""
+        try:
+            data = _json_loads(response_text)
+            return response_class(**{f.name: data[f.name] for f in fields(response_class)})
+        except (json.JSONDecodeError, TypeError, KeyError):
+            return None
+    
+    def _build_structured_prompt(self, prompt: str, response_class: Type[T]) -> str:
+        return prompt + _structured_suffix(response_class)
+    
+    def _parse_structured_response(self, response_text: str, response_class: Type[T]) -> T:
+        # Parse structured response: field -> raw value, first occurrence wins
+        raw_values = {}
+        for match in _field_pattern(response_class).finditer(response_text):
+            raw_values.setdefault(match.group(1), match.group(2))
         
-        # Parse structured response
         result_dict = {}
         for field in fields(response_class):
-            # Look for the field in the response
-            pattern = rf"- {field.name}:\s*(.+?)(?=\n-|\n$|$)"
-            match = re.search(pattern, response_text, re.MULTILINE | re.DOTALL)
-            
-            if match:
-                value = match.group(1).strip()
-                
+            value = raw_values.get(field.name, "").strip()
+            if value:
                 # Convert to appropriate type
                 if field.type == bool:
                     result_dict[field.name] = value.lower() in ['true', 'yes', '1']
@@ -4,11 +4,20 @@ Mafia Multi-Agent Game - Phase 1
 A complete implementation of the Mafia party game using AI agents
 """
 
+import asyncio
 import os
 import sys
 from llm_interface import LLMInterface
 from game_orchestrator import GameOrchestrator
 
+async def _play(game: GameOrchestrator, *llms: LLMInterface) -> str:
+    """Run the game, then close the async clients' connections on the same event loop"""
+    try:
+        return await game.play_game()
+    finally:
+        for llm in llms:
+            await llm.aclose()
+
 def main():
     """Main entry point for the Mafia game"""
     
@@ -28,6 +37,9 @@ def main():
         print("export BASE_URL=your_base_url_here")
         sys.exit(1)
     
+    llm = None
+    villager_llm = None
+    game = None
     try:
         # Initialize LLM interface
         startup_msg = "🚀 Starting Mafia Multi-Agent Game (Phase 1)"
@@ -41,18 +53,28 @@ def main():
 
         llm = LLMInterface(api_key=api_key, model_name=model_name, base_url=base_url)
         
+        # Optional smaller model (e.g. a quantized local one behind llama.cpp or vLLM) for Villager discussion and votes
+        villager_model = os.getenv("VILLAGER_MODEL")
+        if villager_model:
+            villager_llm = LLMInterface(api_key=os.getenv("VILLAGER_API_KEY", api_key), model_name=villager_model,
+                                        base_url=os.getenv("VILLAGER_BASE_URL", base_url))
+            print(f"🤖 Using {villager_model} for Villager discussion and votes")
+        
         # Game configuration
         num_mafia = 2  # Change this to adjust Mafia count
         log_intermediate_contexts = False  # Set to False to disable context logging during game
+        # Sampled replies per Mafia night/vote decision, majority target wins; each sample is a separate request
+        mafia_samples = int(os.getenv("MAFIA_SAMPLES", "1"))
         
         # Create game orchestrator first to get access to logging
         game = GameOrchestrator(
             llm_interface=llm,
             max_discussion_rounds=2,
-            max_mafia_iterations=3,
             num_mafia=num_mafia,
             observer_only=True,  # Only show observer info
-            log_intermediate_contexts=log_intermediate_contexts
+            log_intermediate_contexts=log_intermediate_contexts,
+            mafia_samples=mafia_samples,
+            villager_llm=villager_llm
         )
         
         # Log the startup messages
@@ -61,7 +83,7 @@ def main():
         
         # Initialize and play game
         game.initialize_game()
-        winner = game.play_game()
+        winner = asyncio.run(_play(game, *(l for l in (llm, villager_llm) if l)))
         
         completion_msg = f"\n✅ Game completed! Winner: {winner.upper()}"
         print(completion_msg)
@@ -75,6 +97,12 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if game:
+            game.close()
+        for l in (llm, villager_llm):
+            if l:
+                l.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
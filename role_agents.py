@@ -1,52 +1,32 @@
+from dataclasses import dataclass
 from typing import Dict, List, Optional
-from base_agent import BaseAgent
+from base_agent import BaseAgent, DEFENSE_MAX_TOKENS
 from game_state import GameState, Role, GamePhase
-from structured_responses import NightDecision, DiscussionResponse, VoteDecision, DefenseResponse
+from structured_responses import NightDecision
 
-class MafiaAgent(BaseAgent):
-    def __init__(self, name: str, personality: str, llm_interface):
-        super().__init__(name, personality, Role.MAFIA, llm_interface)
-    
-    def make_night_decision(self, game_state: GameState) -> Optional[Dict]:
-        alive_non_mafia = [p.name for p in game_state.get_alive_players() 
-                          if p.role != Role.MAFIA]
-        
-        if not alive_non_mafia:
-            return None
-        
-        prompt = f"""{self.get_base_context(game_state)}
-
-NIGHT PHASE - MAFIA ELIMINATION DECISION
-
-You must choose someone to eliminate tonight. Consider:
-- Who poses the biggest threat to the Mafia?
-- Who might be the Doctor or Detective?
-- What would be the most strategic elimination?
-
-Available targets: {', '.join(alive_non_mafia)}
-
-Respond with JSON format:
-{{
-    "target": "player_name",
-    "reason": "brief explanation for your choice"
-}}"""
+_ATTACKED_NOTE = "- IMPORTANT: You are being accused/suspected! Defend yourself!"
 
-        response = self.llm.generate_json_response(prompt)
-        return response
-
-    def participate_in_discussion(self, game_state: GameState) -> Optional[DiscussionResponse]:
-        if game_state.phase not in [GamePhase.DAY_DISCUSSION]:
-            return None
-        
-        # Check if being mentioned or attacked recently
-        recent_messages = game_state.discussion_messages[-5:] if game_state.discussion_messages else []
-        being_attacked = any(self.name.lower() in msg.message.lower() and 
-                           any(word in msg.message.lower() for word in ['suspicious', 'sus', 'mafia', 'vote', 'eliminate'])
-                           for msg in recent_messages)
-        
-        urgency = 5 if being_attacked else 3  # High urgency if being attacked
-        
-        prompt = f"""{self.get_base_context(game_state)}
+@dataclass(slots=True, frozen=True)
+class RoleConfig:
+    """Everything that differs between roles' prompts. Templates are str.format_map strings.
+    
+    discussion_tmpl: {context}, {attacked_note}, {urgency}
+    vote_tmpl: {context}, {candidates}
+    defense_tmpl: {context}
+    night_tmpl: {context}, {targets}; None if the role has no night action
+    """
+    role: Role
+    base_urgency: int  # discussion urgency (1-5) when not under attack
+    discussion_tmpl: str
+    vote_tmpl: str
+    defense_tmpl: str
+    night_tmpl: Optional[str] = None
+
+ROLE_CONFIGS: Dict[Role, RoleConfig] = {
+    Role.MAFIA: RoleConfig(
+        role=Role.MAFIA,
+        base_urgency=3,
+        discussion_tmpl="""{context}
 
 DAY DISCUSSION PHASE
 
@@ -54,355 +34,278 @@ As a Mafia member, you need to:
 - Deflect suspicion from yourself and other Mafia
 - Build suspicion against Village members
 - Appear helpful and trustworthy
-{'- IMPORTANT: You are being accused/suspected! Defend yourself!' if being_attacked else ''}
+{attacked_note}
 
 Do you want to speak in this round? If yes, what will you say? Be strategic but natural.
 Keep your response under 100 words.
-Urgency (1-5): {urgency} - higher if you need to defend yourself or respond to someone"""
-
-        response = self.llm.generate_structured_response(prompt, DiscussionResponse)
-        return response
-
-    def vote(self, game_state: GameState, candidates: List[str]) -> Dict[str, str]:
-        from structured_responses import VoteDecision
-        
-        prompt = f"""{self.get_base_context(game_state)}
+Urgency (1-5): {urgency} - higher if you need to defend yourself or respond to someone""",
+        vote_tmpl="""{context}
 
 VOTING PHASE
 
-You must vote to eliminate ONE of these candidates: {', '.join(candidates)}
+You must vote to eliminate ONE of these candidates: {candidates}
 NOTE: You cannot vote for yourself - only choose from the candidates listed above.
 
-Voting history so far:
-{self._format_voting_history(game_state)}
-
 As a Mafia member, vote strategically to eliminate Village members or deflect suspicion.
-Choose your target and provide a clear reason for your vote."""
-
-        vote_decision = self.llm.generate_structured_response(prompt, VoteDecision)
-        
-        # Validate target is in candidates
-        if vote_decision.target not in candidates:
-            # Find closest match
-            target = candidates[0]
-            for candidate in candidates:
-                if candidate.lower() in vote_decision.target.lower():
-                    target = candidate
-                    break
-            vote_decision.target = target
-        
-        return {"target": vote_decision.target, "reason": vote_decision.reason}
-
-    def defend_self(self, game_state: GameState) -> str:
-        prompt = f"""{self.get_base_context(game_state)}
+Choose your target and provide a clear reason for your vote.""",
+        defense_tmpl="""{context}
 
 DEFENSE PHASE
 
 You are being voted for elimination! Make a defense to convince others of your innocence.
 Be convincing but not too desperate. Use your personality and any evidence that supports you.
 
-Respond with your defense (under 150 words)."""
+Respond with your defense (under 150 words).""",
+        night_tmpl="""{context}
 
-        return self.llm.generate_response(prompt)
+NIGHT PHASE - MAFIA ELIMINATION DECISION
 
+You must choose someone to eliminate tonight. Consider:
+- Who poses the biggest threat to the Mafia?
+- Who might be the Doctor or Detective?
+- What would be the most strategic elimination?
 
-    def _format_voting_history(self, game_state: GameState) -> str:
-        if not game_state.votes:
-            return "No votes cast yet."
-        
-        vote_summary = ""
-        for voter, target in game_state.votes.items():
-            vote_summary += f"{voter} voted for {target}\n"
-        return vote_summary
+Available targets: {targets}
 
-class DoctorAgent(BaseAgent):
-    def __init__(self, name: str, personality: str, llm_interface):
-        super().__init__(name, personality, Role.DOCTOR, llm_interface)
+Choose your target and give a brief reason for your choice.""",
+    ),
     
-    def make_night_decision(self, game_state: GameState) -> Optional[Dict]:
-        alive_players = [p.name for p in game_state.get_alive_players() if p.name != self.name]
-        
-        if not alive_players:
-            return None
-        
-        prompt = f"""{self.get_base_context(game_state)}
-
-NIGHT PHASE - DOCTOR SAVE DECISION
-
-You must choose someone to save tonight. Consider:
-- Who is most likely to be targeted by Mafia?
-- Who is most valuable to keep alive?
-- You can save yourself if you have no better clue
-
-Available targets: {', '.join(alive_players)}
-
-Respond with JSON format:
-{{
-    "target": "player_name",
-    "reason": "brief explanation for your choice"
-}}"""
-
-        response = self.llm.generate_json_response(prompt)
-        return response
-
-    def participate_in_discussion(self, game_state: GameState) -> Optional[DiscussionResponse]:
-        if game_state.phase != GamePhase.DAY_DISCUSSION:
-            return None
-        
-        # Check if being mentioned or attacked recently
-        recent_messages = game_state.discussion_messages[-5:] if game_state.discussion_messages else []
-        being_attacked = any(self.name.lower() in msg.message.lower() and 
-                           any(word in msg.message.lower() for word in ['suspicious', 'sus', 'mafia', 'vote', 'eliminate'])
-                           for msg in recent_messages)
-        
-        urgency = 5 if being_attacked else 2  # Doctors are usually more cautious
-        
-        prompt = f"""{self.get_base_context(game_state)}
+    Role.DOCTOR: RoleConfig(
+        role=Role.DOCTOR,
+        base_urgency=2,  # Doctors are usually more cautious
+        discussion_tmpl="""{context}
 
 DAY DISCUSSION PHASE
 
 As the Doctor, be helpful in finding Mafia but don't reveal your role.
 Share your thoughts on who might be suspicious.
-{'- IMPORTANT: You are being accused/suspected! Defend yourself!' if being_attacked else ''}
+{attacked_note}
 
 Do you want to speak? If yes, what will you say?
 Keep response under 100 words.
-Urgency (1-5): {urgency}"""
-
-        response = self.llm.generate_structured_response(prompt, DiscussionResponse)
-        return response
-
-    def vote(self, game_state: GameState, candidates: List[str]) -> Dict[str, str]:
-        from structured_responses import VoteDecision
-        
-        prompt = f"""{self.get_base_context(game_state)}
+Urgency (1-5): {urgency}""",
+        vote_tmpl="""{context}
 
 VOTING PHASE
 
-Vote to eliminate ONE of these candidates: {', '.join(candidates)}
+Vote to eliminate ONE of these candidates: {candidates}
 NOTE: You cannot vote for yourself - only choose from the candidates listed above.
 
-Voting so far:
-{self._format_voting_history(game_state)}
-
 As the Doctor, vote for who you think is most likely to be Mafia.
-Choose your target and provide a clear reason for your vote."""
-
-        vote_decision = self.llm.generate_structured_response(prompt, VoteDecision)
-        
-        # Validate target is in candidates
-        if vote_decision.target not in candidates:
-            target = candidates[0]
-            for candidate in candidates:
-                if candidate.lower() in vote_decision.target.lower():
-                    target = candidate
-                    break
-            vote_decision.target = target
-        
-        return {"target": vote_decision.target, "reason": vote_decision.reason}
-
-    def defend_self(self, game_state: GameState) -> str:
-        prompt = f"""{self.get_base_context(game_state)}
+Choose your target and provide a clear reason for your vote.""",
+        defense_tmpl="""{context}
 
 DEFENSE PHASE
 
 You're being voted for elimination! Defend yourself without revealing you're the Doctor.
 
-Respond with your defense (under 150 words)."""
+Respond with your defense (under 150 words).""",
+        night_tmpl="""{context}
 
-        return self.llm.generate_response(prompt)
+NIGHT PHASE - DOCTOR SAVE DECISION
 
+You must choose someone to save tonight. Consider:
+- Who is most likely to be targeted by Mafia?
+- Who is most valuable to keep alive?
+- You can save yourself if you have no better clue
 
-    def _format_voting_history(self, game_state: GameState) -> str:
-        if not game_state.votes:
-            return "No votes cast yet."
-        vote_summary = ""
-        for voter, target in game_state.votes.items():
-            vote_summary += f"{voter} voted for {target}\n"
-        return vote_summary
+Available targets: {targets}
 
-class DetectiveAgent(BaseAgent):
-    def __init__(self, name: str, personality: str, llm_interface):
-        super().__init__(name, personality, Role.DETECTIVE, llm_interface)
+Choose your target and give a brief reason for your choice.""",
+    ),
     
-    def make_night_decision(self, game_state: GameState) -> Optional[Dict]:
-        alive_players = [p.name for p in game_state.get_alive_players() if p.name != self.name]
-        uninvestigated = [name for name in alive_players 
-                         if name not in game_state.detective_results]
-        
-        if not uninvestigated:
-            return None
-        
-        prompt = f"""{self.get_base_context(game_state)}
-
-NIGHT PHASE - DETECTIVE INVESTIGATION
-
-Choose someone to investigate tonight. You will learn their exact role.
-Consider who you're most suspicious of or who would give you the most information.
-
-Available targets: {', '.join(uninvestigated)}
-
-Respond with JSON format:
-{{
-    "target": "player_name",
-    "reason": "brief explanation for your choice"
-}}"""
-
-        response = self.llm.generate_json_response(prompt)
-        return response
-
-    def participate_in_discussion(self, game_state: GameState) -> Optional[DiscussionResponse]:
-        if game_state.phase != GamePhase.DAY_DISCUSSION:
-            return None
-        
-        # Check if being mentioned or attacked recently
-        recent_messages = game_state.discussion_messages[-5:] if game_state.discussion_messages else []
-        being_attacked = any(self.name.lower() in msg.message.lower() and 
-                           any(word in msg.message.lower() for word in ['suspicious', 'sus', 'mafia', 'vote', 'eliminate'])
-                           for msg in recent_messages)
-        
-        urgency = 5 if being_attacked else 4  # Detectives often have important info
-        
-        prompt = f"""{self.get_base_context(game_state)}
+    Role.DETECTIVE: RoleConfig(
+        role=Role.DETECTIVE,
+        base_urgency=4,  # Detectives often have important info
+        discussion_tmpl="""{context}
 
 DAY DISCUSSION PHASE
 
 As the Detective, you have investigation results but must be strategic about revealing them.
 Consider sharing information that helps eliminate Mafia without making yourself a target.
-{'- IMPORTANT: You are being accused/suspected! Defend yourself!' if being_attacked else ''}
+{attacked_note}
 
 Do you want to speak? If yes, what will you say?
 Keep response under 100 words.
-Urgency (1-5): {urgency}"""
-
-        response = self.llm.generate_structured_response(prompt, DiscussionResponse)
-        return response
-
-    def vote(self, game_state: GameState, candidates: List[str]) -> Dict[str, str]:
-        from structured_responses import VoteDecision
-        
-        prompt = f"""{self.get_base_context(game_state)}
+Urgency (1-5): {urgency}""",
+        vote_tmpl="""{context}
 
 VOTING PHASE
 
-Vote to eliminate ONE of these candidates: {', '.join(candidates)}
+Vote to eliminate ONE of these candidates: {candidates}
 NOTE: You cannot vote for yourself - only choose from the candidates listed above.
 
 As the Detective, use your investigation results to vote strategically.
 You may choose to reveal your findings or keep them secret.
-Choose your target and provide a clear reason for your vote."""
-
-        vote_decision = self.llm.generate_structured_response(prompt, VoteDecision)
-        
-        # Validate target is in candidates
-        if vote_decision.target not in candidates:
-            target = candidates[0]
-            for candidate in candidates:
-                if candidate.lower() in vote_decision.target.lower():
-                    target = candidate
-                    break
-            vote_decision.target = target
-        
-        return {"target": vote_decision.target, "reason": vote_decision.reason}
-
-    def defend_self(self, game_state: GameState) -> str:
-        prompt = f"""{self.get_base_context(game_state)}
+Choose your target and provide a clear reason for your vote.""",
+        defense_tmpl="""{context}
 
 DEFENSE PHASE
 
 You're being voted for elimination! Consider if you should reveal your Detective role and findings.
 
-Respond with your defense (under 150 words)."""
+Respond with your defense (under 150 words).""",
+        night_tmpl="""{context}
 
-        return self.llm.generate_response(prompt)
+NIGHT PHASE - DETECTIVE INVESTIGATION
 
+Choose someone to investigate tonight. You will learn their exact role.
+Consider who you're most suspicious of or who would give you the most information.
 
-    def _format_voting_history(self, game_state: GameState) -> str:
-        if not game_state.votes:
-            return "No votes cast yet."
-        vote_summary = ""
-        for voter, target in game_state.votes.items():
-            vote_summary += f"{voter} voted for {target}\n"
-        return vote_summary
+Available targets: {targets}
 
-class VillagerAgent(BaseAgent):
-    def __init__(self, name: str, personality: str, llm_interface):
-        super().__init__(name, personality, Role.VILLAGER, llm_interface)
+Choose your target and give a brief reason for your choice.""",
+    ),
     
-    def make_night_decision(self, game_state: GameState) -> Optional[Dict]:
-        return None  # Villagers have no night action
-
-    def participate_in_discussion(self, game_state: GameState) -> Optional[DiscussionResponse]:
-        if game_state.phase != GamePhase.DAY_DISCUSSION:
-            return None
-        
-        # Check if being mentioned or attacked recently
-        recent_messages = game_state.discussion_messages[-5:] if game_state.discussion_messages else []
-        being_attacked = any(self.name.lower() in msg.message.lower() and 
-                           any(word in msg.message.lower() for word in ['suspicious', 'sus', 'mafia', 'vote', 'eliminate'])
-                           for msg in recent_messages)
-        
-        urgency = 5 if being_attacked else 3  # Normal urgency for villagers
-        
-        prompt = f"""{self.get_base_context(game_state)}
+    Role.VILLAGER: RoleConfig(
+        role=Role.VILLAGER,
+        base_urgency=3,
+        discussion_tmpl="""{context}
 
 DAY DISCUSSION PHASE
 
 As a Villager, share your thoughts on who might be Mafia based on their behavior and voting patterns.
-{'- IMPORTANT: You are being accused/suspected! Defend yourself!' if being_attacked else ''}
+{attacked_note}
 
 Do you want to speak? If yes, what will you say?
 Keep response under 100 words.
-Urgency (1-5): {urgency}"""
-
-        response = self.llm.generate_structured_response(prompt, DiscussionResponse)
-        return response
-
-    def vote(self, game_state: GameState, candidates: List[str]) -> Dict[str, str]:
-        from structured_responses import VoteDecision
-        
-        prompt = f"""{self.get_base_context(game_state)}
+Urgency (1-5): {urgency}""",
+        vote_tmpl="""{context}
 
 VOTING PHASE
 
-Vote to eliminate ONE of these candidates: {', '.join(candidates)}
+Vote to eliminate ONE of these candidates: {candidates}
 NOTE: You cannot vote for yourself - only choose from the candidates listed above.
 
-Voting so far:
-{self._format_voting_history(game_state)}
-
 As a Villager, vote for who you think is most likely to be Mafia based on behavior and discussion.
-Choose your target and provide a clear reason for your vote."""
-
-        vote_decision = self.llm.generate_structured_response(prompt, VoteDecision)
-        
-        # Validate target is in candidates
-        if vote_decision.target not in candidates:
-            target = candidates[0]
-            for candidate in candidates:
-                if candidate.lower() in vote_decision.target.lower():
-                    target = candidate
-                    break
-            vote_decision.target = target
-        
-        return {"target": vote_decision.target, "reason": vote_decision.reason}
-
-    def defend_self(self, game_state: GameState) -> str:
-        prompt = f"""{self.get_base_context(game_state)}
+Choose your target and provide a clear reason for your vote.""",
+        defense_tmpl="""{context}
 
 DEFENSE PHASE
 
 You're being voted for elimination! Make your case for why you're innocent.
 
-Respond with your defense (under 150 words)."""
+Respond with your defense (under 150 words).""",
+    ),
+}
+
+class RoleAgent(BaseAgent):
+    """Agent whose prompts come from its role's RoleConfig. Subclasses add role knowledge and night targets."""
+    config: RoleConfig
+    
+    def __init__(self, name: str, personality: str, llm_interface):
+        super().__init__(name, personality, self.config.role, llm_interface)
+        self.base_urgency = self.config.base_urgency
+    
+    def night_targets(self, game_state: GameState) -> List[str]:
+        """Who this role may pick at night; no night action if empty"""
+        return []
+    
+    async def make_night_decision(self, game_state: GameState) -> Optional[NightDecision]:
+        if self.config.night_tmpl is None:
+            return None
+        
+        targets = self.night_targets(game_state)
+        if not targets:
+            return None
+        
+        # Nothing has been discussed or voted on before the first night
+        has_history = game_state.round_number > 1
+        
+        prompt = self.config.night_tmpl.format_map({
+            'context': self.get_dynamic_suffix(game_state, include_history=has_history),
+            'targets': ', '.join(targets),
+        })
+        return await self.decide(prompt, NightDecision)
+    
+    def build_discussion_prompt(self, game_state: GameState, shared_block: Optional[str] = None) -> Optional[str]:
+        if game_state.phase != GamePhase.DAY_DISCUSSION:
+            return None
+        
+        # Check if being mentioned or attacked recently
+        being_attacked = self.is_being_attacked(game_state)
+        
+        return self.config.discussion_tmpl.format_map({
+            'context': self.get_dynamic_suffix(game_state, shared_block=shared_block),
+            'attacked_note': _ATTACKED_NOTE if being_attacked else '',
+            'urgency': 5 if being_attacked else self.base_urgency,
+        })
+    
+    def build_vote_prompt(self, game_state: GameState, candidates: List[str]) -> str:
+        return self.config.vote_tmpl.format_map({
+            'context': self.get_dynamic_suffix(game_state),
+            'candidates': ', '.join(candidates),
+        })
+    
+    async def defend_self(self, game_state: GameState) -> str:
+        prompt = self.config.defense_tmpl.format_map({'context': self.get_dynamic_suffix(game_state)})
+        return await self.llm.agenerate_response(prompt, prefix=self.get_static_prefix(), max_tokens=DEFENSE_MAX_TOKENS)
+
+class MafiaAgent(RoleAgent):
+    config = ROLE_CONFIGS[Role.MAFIA]
+    
+    def __init__(self, name: str, personality: str, llm_interface, samples: int = 1):
+        super().__init__(name, personality, llm_interface)
+        # Night kills and votes are the Mafia's key moves; sample them several times and go with the majority
+        self.samples = samples
+    
+    def _build_role_section(self, game_state: GameState) -> str:
+        parts: List[str] = [f"MAFIA TEAM: {game_state.mafia_team_str}\n"]
+        
+        # Show individual Mafia proposals and team decisions
+        parts.append("YOUR PROPOSALS AND TEAM DECISIONS:\n")
+        mafia_actions = game_state.player_night_actions.get(self.name, {}).get('mafia_propose', [])
+        
+        if mafia_actions:
+            for action in mafia_actions:
+                parts.append(f"- Round {action['round']}: You proposed {action['target']} ({action['reason']})\n")
+        else:
+            parts.append("- No proposals made yet\n")
+        return "".join(parts)
+    
+    def night_targets(self, game_state: GameState) -> List[str]:
+        return game_state.alive_village
 
-        return self.llm.generate_response(prompt)
+class DoctorAgent(RoleAgent):
+    config = ROLE_CONFIGS[Role.DOCTOR]
+    
+    def _build_role_section(self, game_state: GameState) -> str:
+        parts: List[str] = ["YOUR SAVE HISTORY:\n"]
+        doctor_actions = game_state.player_night_actions.get(self.name, {}).get('doctor_save', [])
+        
+        if doctor_actions:
+            for action in doctor_actions:
+                parts.append(f"- Round {action['round']}: Saved {action['target']} ({action['reason']})\n")
+        else:
+            parts.append("- No saves attempted yet\n")
+        return "".join(parts)
+    
+    def night_targets(self, game_state: GameState) -> List[str]:
+        return [name for name in game_state.alive_players if name != self.name]
 
+class DetectiveAgent(RoleAgent):
+    config = ROLE_CONFIGS[Role.DETECTIVE]
+    
+    def _build_role_section(self, game_state: GameState) -> str:
+        parts: List[str] = ["YOUR INVESTIGATION RESULTS:\n"]
+        if game_state.detective_results:
+            for target, role in game_state.detective_results.items():
+                parts.append(f"- {target}: {role}\n")
+        else:
+            parts.append("- No investigations completed yet\n")
+        return "".join(parts)
+    
+    def night_targets(self, game_state: GameState) -> List[str]:
+        # One pass over the alive names; detective_results is a dict, so each membership test is O(1)
+        investigated = game_state.detective_results
+        return [name for name in game_state.alive_players if name != self.name and name not in investigated]
 
-    def _format_voting_history(self, game_state: GameState) -> str:
-        if not game_state.votes:
-            return "No votes cast yet."
-        vote_summary = ""
-        for voter, target in game_state.votes.items():
-            vote_summary += f"{voter} voted for {target}\n"
-        return vote_summary
\ No newline at end of file
+class VillagerAgent(RoleAgent):
+    config = ROLE_CONFIGS[Role.VILLAGER]  # no night_tmpl: Villagers have no night action
+    
+    def __init__(self, name: str, personality: str, llm_interface, routine_llm=None):
+        super().__init__(name, personality, llm_interface)
+        # Villagers have no secrets to weigh, so their discussion and votes can go to a smaller model;
+        # defenses stay on the main one
+        if routine_llm is not None:
+            self.routine_llm = routine_llm
@@ -2,25 +2,26 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NightDecision:
     target: str
     reason: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DiscussionResponse:
+    # speak and urgency come before comment so a streamed reply can stop once they say "not speaking"
     speak: bool
-    comment: str
     urgency: int  # 1-5, higher means wants to speak sooner (e.g., to defend)
+    comment: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class VoteDecision:
     target: str
     reason: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DefenseResponse:
     defense: str
\ No newline at end of file